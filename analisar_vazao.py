@@ -1,9 +1,13 @@
 # salvar como: analisar_vazao.py
 
+import argparse
 import json
 import matplotlib.pyplot as plt
 import numpy as np
 
+import instrumentacao
+
+@instrumentacao.medir('plotar_grafico_vazao')
 def plotar_grafico_vazao(arquivo_json="p4emu/p4emu_1_3G_udp/media_testes.json", arquivo_saida="p4emu/p4emu_1_3G_udp/p4emu_3G_udp.png"):
     """
     Lê um arquivo JSON de resultado do iperf3 e gera um gráfico de vazão (throughput)
@@ -14,8 +18,7 @@ def plotar_grafico_vazao(arquivo_json="p4emu/p4emu_1_3G_udp/media_testes.json",
     print(f"Lendo o arquivo de dados do iperf3: '{arquivo_json}'...")
 
     try:
-        with open(arquivo_json, 'r') as f:
-            dados = json.load(f)
+        dados = instrumentacao.ler_json(arquivo_json)
     except FileNotFoundError:
         print(f"ERRO: O arquivo '{arquivo_json}' não foi encontrado.")
         return
@@ -95,8 +98,9 @@ def plotar_grafico_vazao(arquivo_json="p4emu/p4emu_1_3G_udp/media_testes.json",
     plt.tight_layout()  # Ajusta o gráfico para caber na imagem
 
     # Salva a imagem do gráfico
-    plt.savefig(arquivo_saida, dpi=300)
-    plt.close()
+    with instrumentacao.etapa('renderizacao'):
+        plt.savefig(arquivo_saida, dpi=300)
+        plt.close()
 
     print(f"\n✓ Sucesso! Gráfico de vazão salvo em '{arquivo_saida}'")
     print(f"\n📊 ESTATÍSTICAS DA VAZÃO:")
@@ -108,4 +112,15 @@ def plotar_grafico_vazao(arquivo_json="p4emu/p4emu_1_3G_udp/media_testes.json",
 
 
 if __name__ == "__main__":
-    plotar_grafico_vazao()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gráfico de vazão de um teste iperf3")
+    parser.add_argument('--perfil', action='store_true',
+                        help="mede o tempo, CPU e bytes lidos de cada etapa")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="mede também o pico de memória de cada etapa (tempos ficam inflados)")
+    parser.add_argument('--trace', default=instrumentacao.ARQUIVO_TRACE,
+                        help="arquivo de trace (formato Chrome Trace Event) gerado com --perfil")
+    args = parser.parse_args()
+
+    with instrumentacao.perfil(ativo=args.perfil, arquivo_trace=args.trace,
+                               memoria=args.perfil_memoria):
+        plotar_grafico_vazao()
\ No newline at end of file
@@ -1,9 +1,13 @@
 # salvar como: analisar_violino.py
 
+import argparse
 import json
 import matplotlib.pyplot as plt
 import numpy as np
 
+import instrumentacao
+
+@instrumentacao.medir('plotar_grafico_violino')
 def plotar_grafico_violino(arquivos_json, titulo="Comparação de Vazão - Gráfico de Violino", arquivo_saida="grafico_violino.png"):
     """
     Lê múltiplos arquivos JSON de resultado do iperf3 e gera um gráfico de violino
@@ -22,8 +26,7 @@ def plotar_grafico_violino(arquivos_json, titulo="Comparação de Vazão - Gráf
     
     for label, arquivo_json in arquivos_json.items():
         try:
-            with open(arquivo_json, 'r') as f:
-                dados = json.load(f)
+            dados = instrumentacao.ler_json(arquivo_json)
         except FileNotFoundError:
             print(f"AVISO: O arquivo '{arquivo_json}' não foi encontrado. Pulando...")
             continue
@@ -121,13 +124,23 @@ def plotar_grafico_violino(arquivos_json, titulo="Comparação de Vazão - Gráf
     plt.tight_layout()
 
     # Salva a imagem do gráfico
-    plt.savefig(arquivo_saida, dpi=300, bbox_inches='tight')
-    plt.close()
+    with instrumentacao.etapa('renderizacao'):
+        plt.savefig(arquivo_saida, dpi=300, bbox_inches='tight')
+        plt.close()
 
     print(f"\n✓ Sucesso! Gráfico de violino salvo em '{arquivo_saida}'")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gráfico de violino comparando testes iperf3")
+    parser.add_argument('--perfil', action='store_true',
+                        help="mede o tempo, CPU e bytes lidos de cada etapa")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="mede também o pico de memória de cada etapa (tempos ficam inflados)")
+    parser.add_argument('--trace', default=instrumentacao.ARQUIVO_TRACE,
+                        help="arquivo de trace (formato Chrome Trace Event) gerado com --perfil")
+    args = parser.parse_args()
+
     # Exemplo de uso: Comparando diferentes cenários
     arquivos = {
         "P4EMU 3G TCP": "p4emu/p4emu_1_3G_tcp/media_testes.json",
@@ -136,8 +149,10 @@ if __name__ == "__main__":
         "XDP 3G UDP": "xdp/xdp_1_3G_udp/media_testes.json",
     }
     
-    plotar_grafico_violino(
-        arquivos_json=arquivos,
-        titulo="Comparação de Vazão: P4EMU vs XDP (3G)",
-        arquivo_saida="violino_3g.png"
-    )
+    with instrumentacao.perfil(ativo=args.perfil, arquivo_trace=args.trace,
+                               memoria=args.perfil_memoria):
+        plotar_grafico_violino(
+            arquivos_json=arquivos,
+            titulo="Comparação de Vazão: P4EMU vs XDP (3G)",
+            arquivo_saida="violino_3g.png"
+        )
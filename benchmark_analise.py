@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do pipeline de análise dos testes iperf3.
+
+Gera um corpus sintético de arquivos JSON no mesmo formato produzido pelo
+iperf3 (TCP e UDP, com a mesma organização dos diretórios p4emu/ e xdp/) e
+mede o tempo e o uso de memória de cada etapa do pipeline:
+
+    • parse:    leitura e decodificação de todos os arquivos JSON
+    • agregar:  processar_diretorio() e calcular_media_testes() por cenário
+    • relatorio: gerar_relatorio_completo()
+    • graficos: plotar_grafico_vazao() e plotar_grafico_violino()
+
+A memória é registrada de duas formas: o pico do heap Python de cada etapa
+(tracemalloc, que não enxerga buffers nativos como os de renderização do
+matplotlib) e o RSS máximo do processo ao final da etapa (ru_maxrss, que
+inclui as alocações nativas, mas é cumulativo ao longo do benchmark).
+
+Os resultados são acrescentados a um arquivo JSON para que ganhos e
+regressões de desempenho possam ser acompanhados entre versões.
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:            # indisponível no Windows
+    resource = None
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from gera_media_testes import calcular_media_testes
+from gerar_todas_medias import processar_diretorio, gerar_relatorio_completo
+from analisar_vazao import plotar_grafico_vazao
+from analisar_violino import plotar_grafico_violino
+
+
+# Configurações padrão
+MARCADOR_CORPUS = ".corpus_sintetico"          # arquivo que identifica um corpus gerado por este script
+ARQUIVO_RESULTADOS = "benchmark_resultados.json"
+TAMANHOS_CORPUS = [710]                        # execuções por corpus (710 = corpus atual)
+DURACAO = 300                                  # segundos por execução
+INTERVALO_RELATORIO = 1.0                      # segundos por intervalo (-i do iperf3)
+FLUXOS = 1                                     # conexões paralelas (-P do iperf3)
+REPETICOES = 3                                 # repetições de cada etapa
+
+# Cenários no mesmo formato dos diretórios reais: <sistema>_1_<banda>_<protocolo>
+SISTEMAS = ['p4emu', 'xdp']
+BANDAS = {
+    '500mb': 500_000_000,
+    '1G': 1_000_000_000,
+    '2G': 2_000_000_000,
+    '3G': 3_000_000_000,
+    '4G': 4_000_000_000,
+    '10G': 10_000_000_000,
+    '25G': 25_000_000_000,
+}
+PROTOCOLOS = ['tcp', 'udp']
+
+# Capacidade aproximada de cada plano de encaminhamento (bits/s), usada para
+# que o corpus sintético sature nas bandas mais altas como nos testes reais
+CAPACIDADE_SISTEMA = {
+    'p4emu': 2_600_000_000,
+    'xdp': 5_500_000_000,
+}
+
+ETAPAS = ['parse', 'agregar', 'relatorio', 'graficos']
+
+
+def gerar_teste_sintetico(protocolo, vazao_alvo, capacidade, duracao=DURACAO,
+                          intervalo=INTERVALO_RELATORIO, fluxos=FLUXOS, rng=None):
+    """
+    Gera o conteúdo de um arquivo JSON do iperf3 com dados sintéticos.
+
+    Args:
+        protocolo: 'TCP' ou 'UDP'
+        vazao_alvo: Vazão alvo em bits/s (parâmetro -b)
+        capacidade: Vazão máxima que o plano de encaminhamento sustenta (bits/s)
+        duracao: Duração do teste em segundos (parâmetro -t)
+        intervalo: Duração de cada intervalo de relatório em segundos (parâmetro -i)
+        fluxos: Número de conexões paralelas (parâmetro -P)
+        rng: numpy.random.Generator usado para gerar os valores
+
+    Returns:
+        dict com as seções 'start', 'intervals' e 'end' no formato do iperf3
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    blksize = 131072 if protocolo == 'TCP' else 1448
+    total_intervalos = max(1, int(round(duracao / intervalo)))
+    vazao_base = min(vazao_alvo, capacidade) / fluxos
+
+    intervalos = []
+    total_bytes = [0] * fluxos
+    total_retrans = [0] * fluxos
+    total_pacotes = [0] * fluxos
+
+    for idx in range(total_intervalos):
+        inicio = idx * intervalo
+        segundos = intervalo * (1 + rng.normal(0, 0.0005))
+        streams = []
+        soma_bytes = 0
+        soma_retrans = 0
+        soma_pacotes = 0
+
+        for fluxo in range(fluxos):
+            bps = max(0.0, vazao_base * (1 + rng.normal(0, 0.02)))
+            num_bytes = int(bps * segundos / 8)
+            stream = {
+                "socket": 5 + fluxo,
+                "start": inicio,
+                "end": inicio + segundos,
+                "seconds": segundos,
+                "bytes": num_bytes,
+                "bits_per_second": num_bytes * 8 / segundos,
+            }
+            if protocolo == 'TCP':
+                retrans = int(rng.poisson(5))
+                stream.update({
+                    "retransmits": retrans,
+                    "snd_cwnd": int(rng.integers(1_000_000, 4_500_000)),
+                    "snd_wnd": 4790272,
+                    "rtt": int(rng.integers(600, 4400)),
+                    "rttvar": int(rng.integers(50, 400)),
+                    "pmtu": 1500,
+                })
+                soma_retrans += retrans
+                total_retrans[fluxo] += retrans
+            else:
+                pacotes = num_bytes // blksize
+                stream["packets"] = pacotes
+                soma_pacotes += pacotes
+                total_pacotes[fluxo] += pacotes
+            stream.update({"omitted": False, "sender": True})
+            streams.append(stream)
+            soma_bytes += num_bytes
+            total_bytes[fluxo] += num_bytes
+
+        soma = {
+            "start": inicio,
+            "end": inicio + segundos,
+            "seconds": segundos,
+            "bytes": soma_bytes,
+            "bits_per_second": soma_bytes * 8 / segundos,
+        }
+        if protocolo == 'TCP':
+            soma["retransmits"] = soma_retrans
+        else:
+            soma["packets"] = soma_pacotes
+        soma.update({"omitted": False, "sender": True})
+        intervalos.append({"streams": streams, "sum": soma})
+
+    fim = total_intervalos * intervalo
+    bytes_enviados = sum(total_bytes)
+    cpu = {
+        "host_total": float(rng.uniform(15, 65)),
+        "host_user": float(rng.uniform(0.5, 9)),
+        "host_system": float(rng.uniform(14, 56)),
+        "remote_total": float(rng.uniform(25, 45)),
+        "remote_user": float(rng.uniform(0.5, 9)),
+        "remote_system": float(rng.uniform(20, 42)),
+    }
+
+    if protocolo == 'TCP':
+        bytes_recebidos = bytes_enviados - int(rng.integers(0, 4_000_000))
+        retrans = sum(total_retrans)
+        end = {
+            "streams": [{
+                "sender": {
+                    "socket": 5 + fluxo,
+                    "start": 0,
+                    "end": fim,
+                    "seconds": fim,
+                    "bytes": total_bytes[fluxo],
+                    "bits_per_second": total_bytes[fluxo] * 8 / fim,
+                    "retransmits": total_retrans[fluxo],
+                    "sender": True,
+                },
+                "receiver": {
+                    "socket": 5 + fluxo,
+                    "start": 0,
+                    "end": fim,
+                    "seconds": fim,
+                    "bytes": total_bytes[fluxo],
+                    "bits_per_second": total_bytes[fluxo] * 8 / fim,
+                    "sender": True,
+                },
+            } for fluxo in range(fluxos)],
+            "sum_sent": {
+                "start": 0,
+                "end": fim,
+                "seconds": fim,
+                "bytes": bytes_enviados,
+                "bits_per_second": bytes_enviados * 8 / fim,
+                "retransmits": retrans,
+                "sender": True,
+            },
+            "sum_received": {
+                "start": 0,
+                "end": fim,
+                "seconds": fim,
+                "bytes": bytes_recebidos,
+                "bits_per_second": bytes_recebidos * 8 / fim,
+                "sender": True,
+            },
+            "cpu_utilization_percent": cpu,
+            "sender_tcp_congestion": "cubic",
+            "receiver_tcp_congestion": "cubic",
+        }
+    else:
+        pacotes = sum(total_pacotes)
+        perda = min(pacotes, int(rng.poisson(max(1.0, pacotes * 0.0004))))
+        lost_percent = perda / pacotes * 100 if pacotes > 0 else 0.0
+        jitter = float(rng.uniform(0.005, 0.05))
+        bytes_recebidos = bytes_enviados - perda * blksize
+        recebido = {
+            "start": 0,
+            "end": fim,
+            "seconds": fim,
+            "bytes": bytes_recebidos,
+            "bits_per_second": bytes_recebidos * 8 / fim,
+            "jitter_ms": jitter,
+            "lost_packets": perda,
+            "packets": pacotes,
+            "lost_percent": lost_percent,
+            "sender": False,
+        }
+        end = {
+            "streams": [{
+                "udp": {
+                    "socket": 5 + fluxo,
+                    "start": 0,
+                    "end": fim,
+                    "seconds": fim,
+                    "bytes": total_bytes[fluxo],
+                    "bits_per_second": total_bytes[fluxo] * 8 / fim,
+                    "jitter_ms": jitter,
+                    "lost_packets": 0,
+                    "packets": total_pacotes[fluxo],
+                    "lost_percent": 0.0,
+                    "out_of_order": 0,
+                    "sender": True,
+                },
+            } for fluxo in range(fluxos)],
+            "sum": dict(recebido, sender=True),
+            "sum_sent": {
+                "start": 0,
+                "end": fim,
+                "seconds": fim,
+                "bytes": bytes_enviados,
+                "bits_per_second": bytes_enviados * 8 / fim,
+                "jitter_ms": 0,
+                "lost_packets": 0,
+                "packets": pacotes,
+                "lost_percent": 0,
+                "sender": True,
+            },
+            "sum_received": recebido,
+            "cpu_utilization_percent": cpu,
+        }
+
+    start = {
+        "connected": [{
+            "socket": 5 + fluxo,
+            "local_host": "20.20.20.20",
+            "local_port": int(rng.integers(32768, 60999)),
+            "remote_host": "10.10.10.10",
+            "remote_port": 5201,
+        } for fluxo in range(fluxos)],
+        "version": "iperf 3.19.1",
+        "system_info": "Linux host2 6.12.33+deb13-amd64 #1 SMP PREEMPT_DYNAMIC Debian 6.12.33-1 (2025-06-19) x86_64",
+        "timestamp": {
+            "time": "Wed, 19 Nov 2025 18:21:28 GMT",
+            "timesecs": 1763576488,
+        },
+        "connecting_to": {"host": "10.10.10.10", "port": 5201},
+        "cookie": "sinteticosinteticosinteticosintetic",
+        "target_bitrate": vazao_alvo,
+        "fq_rate": 0,
+        "sock_bufsize": 0,
+        "sndbuf_actual": 16384 if protocolo == 'TCP' else 212992,
+        "rcvbuf_actual": 131072 if protocolo == 'TCP' else 212992,
+        "test_start": {
+            "protocol": protocolo,
+            "num_streams": fluxos,
+            "blksize": blksize,
+            "omit": 0,
+            "duration": duracao,
+            "bytes": 0,
+            "blocks": 0,
+            "reverse": 0,
+            "tos": 0,
+            "target_bitrate": vazao_alvo,
+            "bidir": 0,
+            "fqrate": 0,
+            "interval": intervalo,
+        },
+    }
+    if protocolo == 'TCP':
+        start["tcp_mss_default"] = 1448
+
+    return {"start": start, "intervals": intervalos, "end": end}
+
+
+def listar_cenarios():
+    """
+    Retorna a lista de cenários (sistema, banda, protocolo) do corpus sintético.
+    """
+    return [(sistema, banda, protocolo)
+            for sistema in SISTEMAS
+            for banda in BANDAS
+            for protocolo in PROTOCOLOS]
+
+
+def eh_corpus_sintetico(diretorio):
+    """Retorna True se o diretório foi criado por gerar_corpus_sintetico()."""
+    return os.path.isfile(os.path.join(diretorio, MARCADOR_CORPUS))
+
+
+def preparar_diretorio_corpus(diretorio):
+    """
+    Prepara um diretório vazio para o corpus, marcado com MARCADOR_CORPUS.
+
+    Só apaga o conteúdo de um diretório existente se ele contiver o marcador,
+    para nunca remover dados reais (ex.: --corpus xdp).
+
+    Raises:
+        ValueError: se o diretório existir, não estiver vazio e não for um corpus sintético
+    """
+    if os.path.exists(diretorio):
+        if eh_corpus_sintetico(diretorio):
+            shutil.rmtree(diretorio)
+        elif not os.path.isdir(diretorio) or os.listdir(diretorio):
+            raise ValueError(f"'{diretorio}' já existe e não é um corpus sintético; "
+                             f"use um diretório ausente ou vazio")
+    os.makedirs(diretorio, exist_ok=True)
+    with open(os.path.join(diretorio, MARCADOR_CORPUS), 'w', encoding='utf-8') as f:
+        f.write("Corpus sintético gerado por benchmark_analise.py; pode ser apagado.\n")
+
+
+def remover_corpus(diretorio):
+    """Apaga o diretório do corpus, apenas se ele foi criado por este script."""
+    if eh_corpus_sintetico(diretorio):
+        shutil.rmtree(diretorio)
+
+
+def gerar_corpus_sintetico(diretorio_saida, total_execucoes, duracao=DURACAO,
+                           intervalo=INTERVALO_RELATORIO, fluxos=FLUXOS, semente=0):
+    """
+    Gera um corpus sintético de testes iperf3 distribuído entre os cenários.
+
+    As execuções são distribuídas entre os cenários em rodízio, e cada cenário
+    vira um subdiretório <sistema>/<sistema>_1_<banda>_<protocolo>/ contendo
+    arquivos iperf3_1_<banda>_NN.json, como nos diretórios reais.
+
+    Args:
+        diretorio_saida: Diretório raiz do corpus; deve estar ausente, vazio ou
+                         conter um corpus gerado anteriormente por este script
+        total_execucoes: Número total de arquivos JSON a gerar
+        duracao: Duração de cada execução em segundos
+        intervalo: Duração de cada intervalo de relatório em segundos
+        fluxos: Número de conexões paralelas por execução
+        semente: Semente do gerador aleatório (corpus reprodutível)
+
+    Returns:
+        Lista com os caminhos dos diretórios de cenário gerados
+
+    Raises:
+        ValueError: se o diretório contiver arquivos que não são de um corpus sintético
+    """
+    preparar_diretorio_corpus(diretorio_saida)
+
+    rng = np.random.default_rng(semente)
+    cenarios = listar_cenarios()
+    execucoes_por_cenario = [total_execucoes // len(cenarios)] * len(cenarios)
+    for i in range(total_execucoes % len(cenarios)):
+        execucoes_por_cenario[i] += 1
+
+    diretorios = []
+    for (sistema, banda, protocolo), quantidade in zip(cenarios, execucoes_por_cenario):
+        if quantidade == 0:
+            continue
+        diretorio = os.path.join(diretorio_saida, sistema, f"{sistema}_1_{banda}_{protocolo}")
+        os.makedirs(diretorio)
+        diretorios.append(diretorio)
+
+        for indice in range(1, quantidade + 1):
+            dados = gerar_teste_sintetico(protocolo.upper(), BANDAS[banda],
+                                          CAPACIDADE_SISTEMA[sistema], duracao,
+                                          intervalo, fluxos, rng)
+            nome_arquivo = os.path.join(diretorio, f"iperf3_1_{banda}_{indice:02d}.json")
+            with open(nome_arquivo, 'w', encoding='utf-8') as f:
+                json.dump(dados, f, indent='\t')
+
+    return diretorios
+
+
+def etapa_parse(diretorios):
+    """Lê e decodifica todos os arquivos JSON do corpus."""
+    for diretorio in diretorios:
+        for arquivo in sorted(glob.glob(os.path.join(diretorio, "iperf3_*.json"))):
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                json.load(f)
+
+
+def etapa_agregar(diretorios):
+    """Calcula as estatísticas e as médias por intervalo de cada cenário."""
+    for diretorio in diretorios:
+        processar_diretorio(diretorio)
+        calcular_media_testes(diretorio)
+
+
+def etapa_relatorio(diretorio_corpus):
+    """Gera o relatório completo a partir da raiz do corpus."""
+    diretorio_atual = os.getcwd()
+    os.chdir(diretorio_corpus)
+    try:
+        gerar_relatorio_completo()
+    finally:
+        os.chdir(diretorio_atual)
+
+
+def etapa_graficos(diretorios):
+    """Gera o gráfico de vazão de cada cenário e um gráfico de violino geral."""
+    arquivos = {}
+    for diretorio in diretorios:
+        arquivo_media = os.path.join(diretorio, "media_testes.json")
+        plotar_grafico_vazao(arquivo_media, os.path.join(diretorio, "media_testes.png"))
+        arquivos[os.path.basename(diretorio)] = arquivo_media
+    plotar_grafico_violino(arquivos, arquivo_saida=os.path.join(
+        os.path.dirname(os.path.dirname(diretorios[0])), "violino.png"))
+
+
+def rss_maximo_bytes():
+    """
+    Retorna o RSS máximo do processo até o momento (ru_maxrss), em bytes, ou
+    None se o módulo resource não estiver disponível.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa ru_maxrss em KiB; macOS, em bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def medir_etapa(funcao, argumento, repeticoes=REPETICOES, medir_memoria=True):
+    """
+    Mede o tempo de execução e o uso de memória de uma etapa do pipeline.
+
+    A saída de console das funções do pipeline é descartada durante as medições.
+    O pico do heap Python é medido em uma execução separada, pois o tracemalloc
+    distorce os tempos. Ele não inclui alocações nativas (ex.: buffers do
+    matplotlib), que aparecem apenas no RSS máximo do processo.
+
+    Returns:
+        dict com os tempos (s) de cada repetição, mínimo, mediana, pico do heap
+        Python (bytes) e RSS máximo do processo ao final da etapa (bytes)
+    """
+    tempos = []
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao(argumento)
+            tempos.append(time.perf_counter() - inicio)
+
+        pico_memoria = None
+        if medir_memoria:
+            tracemalloc.start()
+            try:
+                funcao(argumento)
+                _, pico_memoria = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+    return {
+        'tempos_s': tempos,
+        'tempo_min_s': min(tempos),
+        'tempo_mediana_s': statistics.median(tempos),
+        'pico_heap_python_bytes': pico_memoria,
+        'rss_maximo_processo_bytes': rss_maximo_bytes(),
+    }
+
+
+def obter_versao():
+    """Retorna o commit git atual (ou None se não estiver em um repositório)."""
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                               capture_output=True, text=True, check=True)
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_benchmark(total_execucoes, diretorio_corpus, duracao=DURACAO,
+                       intervalo=INTERVALO_RELATORIO, fluxos=FLUXOS, repeticoes=REPETICOES,
+                       medir_memoria=True, etapas=ETAPAS):
+    """
+    Gera um corpus sintético e mede cada etapa do pipeline sobre ele.
+
+    Returns:
+        dict com a configuração do corpus e as medições de cada etapa
+    """
+    print(f"🧪 Gerando corpus sintético com {total_execucoes} execuções "
+          f"({duracao}s, intervalo {intervalo}s, {fluxos} fluxo(s))...")
+    inicio = time.perf_counter()
+    diretorios = gerar_corpus_sintetico(diretorio_corpus, total_execucoes, duracao,
+                                        intervalo, fluxos)
+    tempo_geracao = time.perf_counter() - inicio
+    tamanho_bytes = sum(f.stat().st_size for f in Path(diretorio_corpus).rglob("*.json"))
+    print(f"   Corpus gerado em {tempo_geracao:.1f}s ({tamanho_bytes / 1_000_000:.1f} MB, "
+          f"{len(diretorios)} cenários)")
+
+    argumentos = {
+        'parse': diretorios,
+        'agregar': diretorios,
+        'relatorio': diretorio_corpus,
+        'graficos': diretorios,
+    }
+    funcoes = {
+        'parse': etapa_parse,
+        'agregar': etapa_agregar,
+        'relatorio': etapa_relatorio,
+        'graficos': etapa_graficos,
+    }
+
+    medicoes = {}
+    for etapa in ETAPAS:
+        if etapa not in etapas:
+            continue
+        # Os gráficos dependem do media_testes.json gerado na etapa de agregação
+        if etapa == 'graficos' and 'agregar' not in etapas:
+            with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+                etapa_agregar(diretorios)
+        medicao = medir_etapa(funcoes[etapa], argumentos[etapa], repeticoes, medir_memoria)
+        medicoes[etapa] = medicao
+
+        heap = medicao['pico_heap_python_bytes']
+        rss = medicao['rss_maximo_processo_bytes']
+        texto_heap = f"{heap / 1_000_000:.1f} MB" if heap is not None else "-"
+        texto_rss = f"{rss / 1_000_000:.1f} MB" if rss is not None else "-"
+        print(f"   ⏱️  {etapa:<10} mediana {medicao['tempo_mediana_s']:.3f}s  "
+              f"mínimo {medicao['tempo_min_s']:.3f}s  pico heap Python {texto_heap}  "
+              f"RSS máx. processo {texto_rss}")
+
+    return {
+        'execucoes': total_execucoes,
+        'cenarios': len(diretorios),
+        'duracao_s': duracao,
+        'intervalo_s': intervalo,
+        'fluxos': fluxos,
+        'repeticoes': repeticoes,
+        'tamanho_corpus_bytes': tamanho_bytes,
+        'tempo_geracao_s': tempo_geracao,
+        'etapas': medicoes,
+    }
+
+
+def salvar_resultados(resultados, arquivo_resultados=ARQUIVO_RESULTADOS):
+    """
+    Acrescenta uma rodada de benchmark ao arquivo de resultados.
+
+    O arquivo contém uma lista de rodadas, cada uma identificada pela data,
+    pelo commit git e pelas versões do Python e do NumPy.
+    """
+    historico = []
+    if os.path.exists(arquivo_resultados):
+        with open(arquivo_resultados, 'r', encoding='utf-8') as f:
+            historico = json.load(f)
+
+    historico.append({
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'versao': obter_versao(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'resultados': resultados,
+    })
+
+    with open(arquivo_resultados, 'w', encoding='utf-8') as f:
+        json.dump(historico, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de análise iperf3")
+    parser.add_argument('--execucoes', type=int, nargs='+', default=TAMANHOS_CORPUS,
+                        help="tamanhos de corpus (execuções) a medir, ex.: 710 10000 100000")
+    parser.add_argument('--duracao', type=int, default=DURACAO,
+                        help="duração de cada execução sintética em segundos")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_RELATORIO,
+                        help="duração de cada intervalo de relatório em segundos")
+    parser.add_argument('--fluxos', type=int, default=FLUXOS,
+                        help="número de conexões paralelas por execução")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES,
+                        help="repetições de cada etapa")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=ETAPAS,
+                        help="etapas a medir")
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="não mede o pico do heap Python (mais rápido)")
+    parser.add_argument('--corpus', default=None,
+                        help="diretório onde o corpus sintético é gerado; deve estar ausente ou "
+                             "vazio (padrão: diretório temporário)")
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS,
+                        help="arquivo JSON onde os resultados são acrescentados")
+    parser.add_argument('--manter-corpus', action='store_true',
+                        help="não apaga o corpus sintético ao final")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("⏱️  BENCHMARK DO PIPELINE DE ANÁLISE IPERF3")
+    print("=" * 80)
+
+    diretorio_corpus = args.corpus or tempfile.mkdtemp(prefix="corpus_sintetico_")
+
+    resultados = []
+    try:
+        for total_execucoes in args.execucoes:
+            print()
+            resultados.append(executar_benchmark(
+                total_execucoes, diretorio_corpus, args.duracao, args.intervalo, args.fluxos,
+                args.repeticoes, not args.sem_memoria, args.etapas))
+    except ValueError as e:
+        print(f"❌ ERRO: {e}")
+        return 2
+    finally:
+        if args.manter_corpus:
+            print(f"\n📁 Corpus sintético mantido em: {diretorio_corpus}")
+        else:
+            remover_corpus(diretorio_corpus)
+
+    salvar_resultados(resultados, args.saida)
+
+    print("\n" + "=" * 80)
+    print(f"💾 Resultados acrescentados em: {args.saida}")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,10 +1,15 @@
 # salvar como: gera_media_testes.py
 
+import argparse
 import json
 import numpy as np
 import os
 import glob
 
+import instrumentacao
+from sketch_quantis import SketchQuantis, sketch_de_intervalos
+
+@instrumentacao.medir('calcular_media_testes', cenario_pelo_diretorio=True)
 def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arquivo_saida="media_testes.json"):
     """
     Analisa múltiplos arquivos JSON de testes iperf3 e calcula a média dos valores
@@ -41,12 +46,15 @@ def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arq
     lista_total_packets = []
     protocolo = None
     
+    # Sketch de cada teste e sketch do diretório (mescla dos sketches dos testes)
+    sketches_execucoes = {}
+    sketch_vazao = SketchQuantis()
+    
     # Lê todos os arquivos e coleta os dados
     testes_validos = 0
     for arquivo in arquivos:
         try:
-            with open(arquivo, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
+            dados = instrumentacao.ler_json(arquivo)
             
             # Valida se o arquivo contém os dados esperados
             if 'intervals' not in dados:
@@ -92,6 +100,11 @@ def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arq
                 bits_per_second = intervalo['sum']['bits_per_second']
                 dados_por_intervalo[idx].append(bits_per_second)
             
+            # Resume a série de intervalos do teste, junto com as demais estatísticas
+            sketch_execucao = sketch_de_intervalos(dados['intervals'])
+            sketches_execucoes[os.path.basename(arquivo)] = sketch_execucao.para_dict()
+            sketch_vazao.mesclar(sketch_execucao)
+            
             testes_validos += 1
             print(f"✅ Processado: {os.path.basename(arquivo)}")
             
@@ -110,27 +123,27 @@ def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arq
     print(f"📊 Total de intervalos encontrados: {len(dados_por_intervalo)}")
     
     # Calcula as médias para cada intervalo
-    intervalos_media = []
-    for idx in sorted(dados_por_intervalo.keys()):
-        valores = dados_por_intervalo[idx]
-        media_bits_per_second = np.mean(valores)
+    with instrumentacao.etapa('estatisticas'):
+        intervalos_media = []
+        for idx in sorted(dados_por_intervalo.keys()):
+            valores = dados_por_intervalo[idx]
+            media_bits_per_second = np.mean(valores)
         
-        # Cria um intervalo no formato esperado pelo analisar_vazao.py
-        intervalo_media = {
-            "sum": {
-                "start": tempo_por_intervalo[idx],
-                "end": tempo_por_intervalo[idx] + 1.0,
-                "seconds": 1.0,
-                "bits_per_second": float(media_bits_per_second),
-                "bytes": int(media_bits_per_second / 8),
-                "retransmits": 0
+            # Cria um intervalo no formato esperado pelo analisar_vazao.py
+            intervalo_media = {
+                "sum": {
+                    "start": tempo_por_intervalo[idx],
+                    "end": tempo_por_intervalo[idx] + 1.0,
+                    "seconds": 1.0,
+                    "bits_per_second": float(media_bits_per_second),
+                    "bytes": int(media_bits_per_second / 8),
+                    "retransmits": 0
+                }
             }
-        }
-        intervalos_media.append(intervalo_media)
+            intervalos_media.append(intervalo_media)
     
     # Lê o primeiro arquivo válido para copiar metadados
-    with open(arquivos[0], 'r', encoding='utf-8') as f:
-        dados_base = json.load(f)
+    dados_base = instrumentacao.ler_json(arquivos[0])
     
     # Cria o JSON de saída com a estrutura esperada
     resultado = {
@@ -146,13 +159,22 @@ def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arq
     # Adiciona informações sobre a agregação
     resultado["start"]["test_description"] = f"Média de {testes_validos} testes"
     
+    # Guarda os sketches dos intervalos, que podem ser mesclados com os de outros diretórios
+    resultado["sketch_vazao_intervalos"] = sketch_vazao.para_dict()
+    resultado["sketches_execucoes"] = sketches_execucoes
+    
     # Salva o arquivo de saída
     caminho_saida = os.path.join(diretorio_testes, arquivo_saida)
-    with open(caminho_saida, 'w', encoding='utf-8') as f:
-        json.dump(resultado, f, indent='\t')
+    with instrumentacao.etapa('escrita'):
+        with open(caminho_saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent='\t')
     
     print(f"\n✅ Arquivo de média gerado com sucesso: '{caminho_saida}'")
     print(f"📈 Média geral de vazão: {resultado['end']['sum_received']['bits_per_second']/1_000_000:.2f} Mbps")
+    if sketch_vazao.contagem:
+        print(f"📈 Percentis de vazão por intervalo ({sketch_vazao.contagem} intervalos):")
+        for percentil in (1, 50, 99):
+            print(f"   • p{percentil}: {sketch_vazao.quantil(percentil / 100) / 1_000_000:.2f} Mbps")
     
     # Exibe informações sobre pacotes perdidos ou retransmissões
     if protocolo == 'UDP' and lista_lost_packets:
@@ -184,6 +206,15 @@ def calcular_media_testes(diretorio_testes, padrao_arquivos="iperf3_*.json", arq
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de média de testes iperf3")
+    parser.add_argument('--perfil', action='store_true',
+                        help="mede o tempo, CPU e bytes lidos de cada etapa")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="mede também o pico de memória de cada etapa (tempos ficam inflados)")
+    parser.add_argument('--trace', default=instrumentacao.ARQUIVO_TRACE,
+                        help="arquivo de trace (formato Chrome Trace Event) gerado com --perfil")
+    args = parser.parse_args()
+
     # Configurações padrão
     DIRETORIO = "xdp/xdp_1_2G_udp"
     PADRAO = "xdp_1_2G_*.json"
@@ -194,7 +225,9 @@ if __name__ == "__main__":
     print("=" * 70)
     print()
     
-    calcular_media_testes(DIRETORIO, PADRAO, SAIDA)
+    with instrumentacao.perfil(ativo=args.perfil, arquivo_trace=args.trace,
+                               memoria=args.perfil_memoria):
+        calcular_media_testes(DIRETORIO, PADRAO, SAIDA)
     
     print()
     print("=" * 70)
@@ -5,13 +5,21 @@ Script para processar todos os testes iperf3 dos diretórios p4emu e xdp
 e gerar um relatório completo com todas as estatísticas.
 """
 
+import argparse
 import json
 import numpy as np
 import os
 import glob
 from pathlib import Path
 
+import instrumentacao
+from sketch_quantis import SketchQuantis, mesclar_sketches, sketch_de_intervalos
 
+# Percentis de vazão por intervalo incluídos no relatório
+PERCENTIS = [1, 50, 99]
+
+
+@instrumentacao.medir('processar_diretorio', cenario_pelo_diretorio=True)
 def processar_diretorio(diretorio_testes):
     """
     Processa um diretório de testes iperf3 e retorna as estatísticas.
@@ -38,12 +46,15 @@ def processar_diretorio(diretorio_testes):
     protocolo = None
     vazao_alvo = None
     
+    # Sketch de cada execução e sketch do cenário (mescla dos sketches das execuções)
+    sketches_execucoes = {}
+    sketch_vazao = SketchQuantis()
+    
     testes_validos = 0
     
     for arquivo in arquivos:
         try:
-            with open(arquivo, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
+            dados = instrumentacao.ler_json(arquivo)
             
             if 'intervals' not in dados or 'end' not in dados:
                 continue
@@ -77,6 +88,11 @@ def processar_diretorio(diretorio_testes):
                         estimated_packets = total_bytes / 1500
                         lista_total_packets.append(estimated_packets)
             
+            # Resume a série de intervalos da execução, junto com as demais estatísticas
+            sketch_execucao = sketch_de_intervalos(dados['intervals'])
+            sketches_execucoes[os.path.basename(arquivo)] = sketch_execucao.para_dict()
+            sketch_vazao.mesclar(sketch_execucao)
+            
             testes_validos += 1
             
         except (FileNotFoundError, json.JSONDecodeError, Exception):
@@ -86,35 +102,61 @@ def processar_diretorio(diretorio_testes):
         return None
     
     # Calcula estatísticas
-    resultado = {
-        'diretorio': os.path.basename(diretorio_testes),
-        'protocolo': protocolo,
-        'vazao_alvo_mbps': vazao_alvo / 1_000_000 if vazao_alvo else 0,
-        'testes_validos': testes_validos,
-        'vazao_media_mbps': np.mean(dados_vazao) / 1_000_000 if dados_vazao else 0,
-        'vazao_min_mbps': np.min(dados_vazao) / 1_000_000 if dados_vazao else 0,
-        'vazao_max_mbps': np.max(dados_vazao) / 1_000_000 if dados_vazao else 0,
-        'vazao_desvio_mbps': np.std(dados_vazao) / 1_000_000 if dados_vazao else 0,
-    }
-    
-    # Adiciona estatísticas específicas por protocolo
-    if protocolo == 'UDP' and lista_lost_packets:
-        resultado['lost_packets_medio'] = np.mean(lista_lost_packets)
-        resultado['lost_packets_total'] = sum(lista_lost_packets)
-        resultado['lost_percent_medio'] = np.mean(lista_lost_percent)
-        resultado['total_packets'] = sum(lista_total_packets)
-        resultado['lost_percent_real'] = (sum(lista_lost_packets) / sum(lista_total_packets) * 100) if sum(lista_total_packets) > 0 else 0
-    elif protocolo == 'TCP' and lista_retransmits:
-        resultado['retransmits_medio'] = np.mean(lista_retransmits)
-        resultado['retransmits_total'] = sum(lista_retransmits)
-        resultado['retransmits_min'] = min(lista_retransmits)
-        resultado['retransmits_max'] = max(lista_retransmits)
-        resultado['packets_estimado'] = sum(lista_total_packets)
-        resultado['retransmits_percent'] = (sum(lista_retransmits) / sum(lista_total_packets) * 100) if sum(lista_total_packets) > 0 else 0
+    with instrumentacao.etapa('estatisticas'):
+        resultado = {
+            'diretorio': os.path.basename(diretorio_testes),
+            'protocolo': protocolo,
+            'vazao_alvo_mbps': vazao_alvo / 1_000_000 if vazao_alvo else 0,
+            'testes_validos': testes_validos,
+            'vazao_media_mbps': np.mean(dados_vazao) / 1_000_000 if dados_vazao else 0,
+            'vazao_min_mbps': np.min(dados_vazao) / 1_000_000 if dados_vazao else 0,
+            'vazao_max_mbps': np.max(dados_vazao) / 1_000_000 if dados_vazao else 0,
+            'vazao_desvio_mbps': np.std(dados_vazao) / 1_000_000 if dados_vazao else 0,
+        }
+    
+        # Percentis de vazão por intervalo, estimados pelo sketch
+        if sketch_vazao.contagem:
+            for percentil in PERCENTIS:
+                resultado[f'vazao_intervalo_p{percentil}_mbps'] = sketch_vazao.quantil(percentil / 100) / 1_000_000
+            resultado['sketch_vazao_intervalos'] = sketch_vazao.para_dict()
+            resultado['sketches_execucoes'] = sketches_execucoes
+    
+        # Adiciona estatísticas específicas por protocolo
+        if protocolo == 'UDP' and lista_lost_packets:
+            resultado['lost_packets_medio'] = np.mean(lista_lost_packets)
+            resultado['lost_packets_total'] = sum(lista_lost_packets)
+            resultado['lost_percent_medio'] = np.mean(lista_lost_percent)
+            resultado['total_packets'] = sum(lista_total_packets)
+            resultado['lost_percent_real'] = (sum(lista_lost_packets) / sum(lista_total_packets) * 100) if sum(lista_total_packets) > 0 else 0
+        elif protocolo == 'TCP' and lista_retransmits:
+            resultado['retransmits_medio'] = np.mean(lista_retransmits)
+            resultado['retransmits_total'] = sum(lista_retransmits)
+            resultado['retransmits_min'] = min(lista_retransmits)
+            resultado['retransmits_max'] = max(lista_retransmits)
+            resultado['packets_estimado'] = sum(lista_total_packets)
+            resultado['retransmits_percent'] = (sum(lista_retransmits) / sum(lista_total_packets) * 100) if sum(lista_total_packets) > 0 else 0
     
     return resultado
 
 
+def imprimir_percentis_sistema(resultados):
+    """
+    Mescla os sketches de vazão dos cenários e imprime os percentis por intervalo.
+    
+    Args:
+        resultados: Lista de resultados de processar_diretorio()
+    """
+    sketches = [r['sketch_vazao_intervalos'] for r in resultados if 'sketch_vazao_intervalos' in r]
+    if not sketches:
+        return
+    
+    sketch = mesclar_sketches(sketches)
+    percentis = " / ".join(f"{sketch.quantil(p / 100) / 1_000_000:.2f}" for p in PERCENTIS)
+    rotulos = "/".join(f"p{p}" for p in PERCENTIS)
+    print(f"      - Percentis por intervalo ({rotulos}): {percentis} Mbps ({sketch.contagem} intervalos)")
+
+
+@instrumentacao.medir('gerar_relatorio_completo')
 def gerar_relatorio_completo():
     """
     Processa todos os diretórios de testes e gera um relatório completo.
@@ -156,78 +198,98 @@ def gerar_relatorio_completo():
             resultado['sistema'] = dir_base
             todos_resultados.append(resultado)
             
-            # Imprime resultado formatado
-            print(f"📁 {subdir.name}")
-            print(f"   {'─'*74}")
-            print(f"   Protocolo: {resultado['protocolo']}")
-            print(f"   Vazão Alvo: {resultado['vazao_alvo_mbps']:.2f} Mbps")
-            print(f"   Testes Válidos: {resultado['testes_validos']}")
-            print(f"   ")
-            print(f"   📈 VAZÃO:")
-            print(f"      • Média: {resultado['vazao_media_mbps']:.2f} Mbps")
-            print(f"      • Mínima: {resultado['vazao_min_mbps']:.2f} Mbps")
-            print(f"      • Máxima: {resultado['vazao_max_mbps']:.2f} Mbps")
-            print(f"      • Desvio Padrão: {resultado['vazao_desvio_mbps']:.2f} Mbps")
-            
-            if resultado['protocolo'] == 'UDP':
+            with instrumentacao.etapa('impressao', cenario=subdir.name):
+                # Imprime resultado formatado
+                print(f"📁 {subdir.name}")
+                print(f"   {'─'*74}")
+                print(f"   Protocolo: {resultado['protocolo']}")
+                print(f"   Vazão Alvo: {resultado['vazao_alvo_mbps']:.2f} Mbps")
+                print(f"   Testes Válidos: {resultado['testes_validos']}")
                 print(f"   ")
-                print(f"   📦 PACOTES PERDIDOS:")
-                print(f"      • Média por teste: {resultado['lost_packets_medio']:.2f}")
-                print(f"      • Total perdidos: {resultado['lost_packets_total']}")
-                print(f"      • Total transmitidos: {int(resultado['total_packets'])}")
-                print(f"      • Percentual real: {resultado['lost_percent_real']:.6f}%")
-            elif resultado['protocolo'] == 'TCP':
-                print(f"   ")
-                print(f"   🔄 RETRANSMISSÕES:")
-                print(f"      • Média por teste: {resultado['retransmits_medio']:.2f}")
-                print(f"      • Total: {int(resultado['retransmits_total'])}")
-                print(f"      • Mínimo: {resultado['retransmits_min']}")
-                print(f"      • Máximo: {resultado['retransmits_max']}")
-                print(f"      • Percentual: {resultado['retransmits_percent']:.6f}%")
+                print(f"   📈 VAZÃO:")
+                print(f"      • Média: {resultado['vazao_media_mbps']:.2f} Mbps")
+                print(f"      • Mínima: {resultado['vazao_min_mbps']:.2f} Mbps")
+                print(f"      • Máxima: {resultado['vazao_max_mbps']:.2f} Mbps")
+                print(f"      • Desvio Padrão: {resultado['vazao_desvio_mbps']:.2f} Mbps")
+                if 'sketch_vazao_intervalos' in resultado:
+                    percentis = " / ".join(f"{resultado[f'vazao_intervalo_p{p}_mbps']:.2f}" for p in PERCENTIS)
+                    rotulos = "/".join(f"p{p}" for p in PERCENTIS)
+                    print(f"      • Percentis por intervalo ({rotulos}): {percentis} Mbps")
+            
+                if resultado['protocolo'] == 'UDP':
+                    print(f"   ")
+                    print(f"   📦 PACOTES PERDIDOS:")
+                    print(f"      • Média por teste: {resultado['lost_packets_medio']:.2f}")
+                    print(f"      • Total perdidos: {resultado['lost_packets_total']}")
+                    print(f"      • Total transmitidos: {int(resultado['total_packets'])}")
+                    print(f"      • Percentual real: {resultado['lost_percent_real']:.6f}%")
+                elif resultado['protocolo'] == 'TCP':
+                    print(f"   ")
+                    print(f"   🔄 RETRANSMISSÕES:")
+                    print(f"      • Média por teste: {resultado['retransmits_medio']:.2f}")
+                    print(f"      • Total: {int(resultado['retransmits_total'])}")
+                    print(f"      • Mínimo: {resultado['retransmits_min']}")
+                    print(f"      • Máximo: {resultado['retransmits_max']}")
+                    print(f"      • Percentual: {resultado['retransmits_percent']:.6f}%")
             
-            print()
+                print()
     
-    # Resumo final
-    print("\n" + "=" * 80)
-    print("📊 RESUMO GERAL")
-    print("=" * 80)
-    print(f"\nTotal de diretórios processados: {len(todos_resultados)}")
-    
-    # Agrupa por sistema
-    for sistema in ['p4emu', 'xdp']:
-        resultados_sistema = [r for r in todos_resultados if r['sistema'] == sistema]
-        if resultados_sistema:
-            print(f"\n{sistema.upper()}:")
-            print(f"   • Total de testes: {sum(r['testes_validos'] for r in resultados_sistema)}")
+    with instrumentacao.etapa('impressao'):
+        # Resumo final
+        print("\n" + "=" * 80)
+        print("📊 RESUMO GERAL")
+        print("=" * 80)
+        print(f"\nTotal de diretórios processados: {len(todos_resultados)}")
+    
+        # Agrupa por sistema
+        for sistema in ['p4emu', 'xdp']:
+            resultados_sistema = [r for r in todos_resultados if r['sistema'] == sistema]
+            if resultados_sistema:
+                print(f"\n{sistema.upper()}:")
+                print(f"   • Total de testes: {sum(r['testes_validos'] for r in resultados_sistema)}")
             
-            tcp_results = [r for r in resultados_sistema if r['protocolo'] == 'TCP']
-            udp_results = [r for r in resultados_sistema if r['protocolo'] == 'UDP']
+                tcp_results = [r for r in resultados_sistema if r['protocolo'] == 'TCP']
+                udp_results = [r for r in resultados_sistema if r['protocolo'] == 'UDP']
             
-            if tcp_results:
-                print(f"   • Testes TCP: {len(tcp_results)} diretórios")
-                vazao_media_tcp = np.mean([r['vazao_media_mbps'] for r in tcp_results])
-                retrans_total = sum(r.get('retransmits_total', 0) for r in tcp_results)
-                print(f"      - Vazão média: {vazao_media_tcp:.2f} Mbps")
-                print(f"      - Total de retransmissões: {int(retrans_total)}")
+                if tcp_results:
+                    print(f"   • Testes TCP: {len(tcp_results)} diretórios")
+                    vazao_media_tcp = np.mean([r['vazao_media_mbps'] for r in tcp_results])
+                    retrans_total = sum(r.get('retransmits_total', 0) for r in tcp_results)
+                    print(f"      - Vazão média: {vazao_media_tcp:.2f} Mbps")
+                    imprimir_percentis_sistema(tcp_results)
+                    print(f"      - Total de retransmissões: {int(retrans_total)}")
             
-            if udp_results:
-                print(f"   • Testes UDP: {len(udp_results)} diretórios")
-                vazao_media_udp = np.mean([r['vazao_media_mbps'] for r in udp_results])
-                lost_total = sum(r.get('lost_packets_total', 0) for r in udp_results)
-                print(f"      - Vazão média: {vazao_media_udp:.2f} Mbps")
-                print(f"      - Total de pacotes perdidos: {int(lost_total)}")
-    
-    print("\n" + "=" * 80)
-    print("✅ Processamento concluído!")
-    print("=" * 80)
+                if udp_results:
+                    print(f"   • Testes UDP: {len(udp_results)} diretórios")
+                    vazao_media_udp = np.mean([r['vazao_media_mbps'] for r in udp_results])
+                    lost_total = sum(r.get('lost_packets_total', 0) for r in udp_results)
+                    print(f"      - Vazão média: {vazao_media_udp:.2f} Mbps")
+                    imprimir_percentis_sistema(udp_results)
+                    print(f"      - Total de pacotes perdidos: {int(lost_total)}")
     
-    # Salva resultados em JSON
-    output_file = "relatorio_completo_testes.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(todos_resultados, f, indent=2, ensure_ascii=False)
+        print("\n" + "=" * 80)
+        print("✅ Processamento concluído!")
+        print("=" * 80)
     
-    print(f"\n💾 Resultados salvos em: {output_file}")
+    with instrumentacao.etapa('escrita'):
+        # Salva resultados em JSON
+        output_file = "relatorio_completo_testes.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(todos_resultados, f, indent=2, ensure_ascii=False)
+    
+        print(f"\n💾 Resultados salvos em: {output_file}")
 
 
 if __name__ == "__main__":
-    gerar_relatorio_completo()
+    parser = argparse.ArgumentParser(description="Relatório completo dos testes iperf3")
+    parser.add_argument('--perfil', action='store_true',
+                        help="mede o tempo, CPU e bytes lidos de cada etapa")
+    parser.add_argument('--perfil-memoria', action='store_true',
+                        help="mede também o pico de memória de cada etapa (tempos ficam inflados)")
+    parser.add_argument('--trace', default=instrumentacao.ARQUIVO_TRACE,
+                        help="arquivo de trace (formato Chrome Trace Event) gerado com --perfil")
+    args = parser.parse_args()
+
+    with instrumentacao.perfil(ativo=args.perfil, arquivo_trace=args.trace,
+                               memoria=args.perfil_memoria):
+        gerar_relatorio_completo()
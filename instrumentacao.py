@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação das etapas do pipeline de análise dos testes iperf3.
+
+Quando ativada, cada etapa marcada com `etapa(nome)` registra tempo de parede,
+tempo de CPU e bytes lidos do disco, agrupados por etapa e por diretório de
+cenário. O pico de memória só é medido com `ativar(memoria=True)`: o
+tracemalloc encarece cada alocação e distorceria os tempos (principalmente da
+decodificação JSON), por isso tempos e memória devem ser medidos em execuções
+separadas. Ao final é possível imprimir uma tabela resumo e
+salvar um arquivo de trace no formato Chrome Trace Event, que pode ser aberto
+em chrome://tracing, https://ui.perfetto.dev ou https://www.speedscope.app.
+
+Quando desativada (padrão), `etapa()` devolve sempre o mesmo objeto vazio e o
+custo por chamada é apenas o de um `with`, de modo que a instrumentação pode
+permanecer no código de produção.
+
+Exemplo de uso:
+    import instrumentacao
+    instrumentacao.ativar()
+    with instrumentacao.etapa('cenario', cenario='xdp_1_1G_udp'):
+        dados = instrumentacao.ler_json(arquivo)
+    instrumentacao.imprimir_resumo()
+    instrumentacao.salvar_trace('perfil_trace.json')
+"""
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+
+ARQUIVO_TRACE = "perfil_trace.json"
+
+_ativo = False
+_memoria = False
+_pilha = []
+_eventos = []
+_resumo = {}
+_inicio_perfil = 0.0
+
+
+class _EtapaVazia:
+    """Gerenciador de contexto sem efeito, usado com a instrumentação desativada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_VAZIA = _EtapaVazia()
+
+
+class _Etapa:
+    """Mede uma etapa do pipeline e acumula o resultado no resumo."""
+
+    __slots__ = ('nome', 'cenario', 'inicio_parede', 'inicio_cpu', 'bytes_lidos', 'pico_memoria')
+
+    def __init__(self, nome, cenario):
+        self.nome = nome
+        self.cenario = cenario
+        self.bytes_lidos = 0
+        self.pico_memoria = 0
+
+    def __enter__(self):
+        if _pilha:
+            pai = _pilha[-1]
+            if self.cenario is None:
+                self.cenario = pai.cenario
+            if _memoria:
+                # O pico acumulado até aqui pertence à etapa pai
+                pai.pico_memoria = max(pai.pico_memoria, tracemalloc.get_traced_memory()[1])
+        if _memoria:
+            tracemalloc.reset_peak()
+        _pilha.append(self)
+        self.inicio_cpu = time.process_time()
+        self.inicio_parede = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao_parede = time.perf_counter() - self.inicio_parede
+        duracao_cpu = time.process_time() - self.inicio_cpu
+        if _memoria:
+            self.pico_memoria = max(self.pico_memoria, tracemalloc.get_traced_memory()[1])
+        _pilha.pop()
+
+        if _pilha:
+            pai = _pilha[-1]
+            pai.bytes_lidos += self.bytes_lidos
+            pai.pico_memoria = max(pai.pico_memoria, self.pico_memoria)
+
+        _eventos.append({
+            "name": self.nome,
+            "cat": self.cenario or "geral",
+            "ph": "X",
+            "ts": (self.inicio_parede - _inicio_perfil) * 1_000_000,
+            "dur": duracao_parede * 1_000_000,
+            "pid": os.getpid(),
+            "tid": 0,
+            "args": {
+                "cenario": self.cenario,
+                "cpu_ms": duracao_cpu * 1000,
+                "bytes_lidos": self.bytes_lidos,
+                "pico_memoria_bytes": self.pico_memoria if _memoria else None,
+            },
+        })
+
+        chave = (self.cenario, self.nome)
+        acumulado = _resumo.get(chave)
+        if acumulado is None:
+            acumulado = _resumo[chave] = {
+                'chamadas': 0,
+                'parede_s': 0.0,
+                'cpu_s': 0.0,
+                'bytes_lidos': 0,
+                'pico_memoria_bytes': 0,
+            }
+        acumulado['chamadas'] += 1
+        acumulado['parede_s'] += duracao_parede
+        acumulado['cpu_s'] += duracao_cpu
+        acumulado['bytes_lidos'] += self.bytes_lidos
+        acumulado['pico_memoria_bytes'] = max(acumulado['pico_memoria_bytes'], self.pico_memoria)
+        return False
+
+
+def ativar(memoria=False):
+    """
+    Ativa a instrumentação e descarta as medições anteriores.
+
+    Args:
+        memoria: Se True, inicia o tracemalloc para medir o pico de memória de
+                 cada etapa; os tempos medidos nesse modo ficam inflados
+    """
+    global _ativo, _memoria, _inicio_perfil
+    _eventos.clear()
+    _resumo.clear()
+    _pilha.clear()
+    _memoria = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _inicio_perfil = time.perf_counter()
+    _ativo = True
+
+
+def desativar():
+    """Desativa a instrumentação, mantendo as medições já registradas."""
+    global _ativo
+    _ativo = False
+    _pilha.clear()
+    if _memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def ativo():
+    """Retorna True se a instrumentação estiver ativa."""
+    return _ativo
+
+
+def etapa(nome, cenario=None):
+    """
+    Retorna um gerenciador de contexto que mede a etapa `nome`.
+
+    Args:
+        nome: Nome da etapa (ex.: 'leitura', 'decodificacao', 'estatisticas')
+        cenario: Diretório de cenário ao qual a etapa pertence; se omitido,
+                 herda o cenário da etapa em que está aninhada
+    """
+    if not _ativo:
+        return _ETAPA_VAZIA
+    return _Etapa(nome, cenario)
+
+
+def medir(nome, cenario_pelo_diretorio=False):
+    """
+    Decorador que mede cada chamada da função como uma etapa `nome`.
+
+    Args:
+        nome: Nome da etapa
+        cenario_pelo_diretorio: Se True, usa o nome do diretório passado como
+                                primeiro argumento como cenário da etapa
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            cenario = None
+            if cenario_pelo_diretorio and args:
+                cenario = os.path.basename(os.path.normpath(str(args[0])))
+            with _Etapa(nome, cenario):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def registrar_bytes(quantidade):
+    """Contabiliza bytes lidos do disco na etapa corrente."""
+    if _ativo and _pilha:
+        _pilha[-1].bytes_lidos += quantidade
+
+
+def ler_json(arquivo):
+    """
+    Lê e decodifica um arquivo JSON, separando as etapas 'leitura' e 'decodificacao'.
+
+    Args:
+        arquivo: Caminho do arquivo JSON (codificado em UTF-8)
+
+    Returns:
+        O objeto decodificado
+    """
+    with etapa('leitura'):
+        with open(arquivo, 'rb') as f:
+            conteudo = f.read()
+        registrar_bytes(len(conteudo))
+    with etapa('decodificacao'):
+        return json.loads(conteudo)
+
+
+def obter_resumo():
+    """
+    Retorna as medições acumuladas como uma lista de dicionários, um por
+    par (cenário, etapa), na ordem em que as etapas terminaram pela primeira vez.
+    """
+    return [dict(cenario=cenario, etapa=nome, **valores)
+            for (cenario, nome), valores in _resumo.items()]
+
+
+def _formatar_memoria(pico_bytes):
+    """Formata o pico de memória em MB, ou '-' se a memória não foi medida."""
+    return f"{pico_bytes / 1_000_000:.2f}" if _memoria else "-"
+
+
+def imprimir_resumo():
+    """Imprime a tabela resumo das medições por cenário e etapa."""
+    linhas = obter_resumo()
+    if not linhas:
+        print("⚠️  Nenhuma etapa instrumentada foi registrada.")
+        return
+
+    print("\n" + "=" * 114)
+    print("⏱️  PERFIL DE EXECUÇÃO POR ETAPA")
+    print("=" * 114)
+    print(f"{'Cenário':<26} {'Etapa':<26} {'Chamadas':>9} {'Parede (s)':>11} "
+          f"{'CPU (s)':>10} {'Lido (MB)':>11} {'Pico mem (MB)':>14}")
+    print("─" * 114)
+    for linha in sorted(linhas, key=lambda l: (l['cenario'] or '', -l['parede_s'])):
+        print(f"{(linha['cenario'] or '(geral)'):<26} {linha['etapa']:<26} {linha['chamadas']:>9} "
+              f"{linha['parede_s']:>11.3f} {linha['cpu_s']:>10.3f} "
+              f"{linha['bytes_lidos'] / 1_000_000:>11.2f} "
+              f"{_formatar_memoria(linha['pico_memoria_bytes']):>14}")
+
+    # Totais por etapa, somando todos os cenários
+    totais = {}
+    for linha in linhas:
+        total = totais.setdefault(linha['etapa'], {'chamadas': 0, 'parede_s': 0.0, 'cpu_s': 0.0,
+                                                   'bytes_lidos': 0, 'pico_memoria_bytes': 0})
+        total['chamadas'] += linha['chamadas']
+        total['parede_s'] += linha['parede_s']
+        total['cpu_s'] += linha['cpu_s']
+        total['bytes_lidos'] += linha['bytes_lidos']
+        total['pico_memoria_bytes'] = max(total['pico_memoria_bytes'], linha['pico_memoria_bytes'])
+
+    print("─" * 114)
+    for nome, total in sorted(totais.items(), key=lambda t: -t[1]['parede_s']):
+        print(f"{'TOTAL':<26} {nome:<26} {total['chamadas']:>9} {total['parede_s']:>11.3f} "
+              f"{total['cpu_s']:>10.3f} {total['bytes_lidos'] / 1_000_000:>11.2f} "
+              f"{_formatar_memoria(total['pico_memoria_bytes']):>14}")
+    print("=" * 114)
+    if _memoria:
+        print("⚠️  Memória medida com tracemalloc: os tempos desta execução estão inflados.")
+
+
+def salvar_trace(arquivo_saida=ARQUIVO_TRACE):
+    """
+    Salva as etapas registradas no formato Chrome Trace Event (JSON).
+
+    Args:
+        arquivo_saida: Caminho do arquivo de trace
+    """
+    with open(arquivo_saida, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": _eventos, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    print(f"💾 Trace salvo em: {arquivo_saida}")
+
+
+class perfil:
+    """
+    Gerenciador de contexto que ativa a instrumentação durante o bloco e, ao
+    final, imprime a tabela resumo e salva o arquivo de trace.
+
+    Exemplo de uso:
+        with instrumentacao.perfil(ativo=args.perfil, memoria=args.perfil_memoria):
+            gerar_relatorio_completo()
+    """
+
+    def __init__(self, ativo=True, arquivo_trace=ARQUIVO_TRACE, memoria=False):
+        self.ativo = ativo or memoria
+        self.arquivo_trace = arquivo_trace
+        self.memoria = memoria
+
+    def __enter__(self):
+        if self.ativo:
+            ativar(self.memoria)
+        return self
+
+    def __exit__(self, *exc):
+        if self.ativo:
+            desativar()
+            imprimir_resumo()
+            salvar_trace(self.arquivo_trace)
+        return False
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificação de regressão de desempenho contra uma baseline armazenada.
+
+Guarda as distribuições por execução (vazão, perda de pacotes, retransmissões
+e uso de CPU) de cada cenário de uma campanha de testes e, após uma
+atualização do P4EMU, do XDP ou do freeRtr, compara a nova campanha com essa
+baseline.
+
+Uma métrica de um cenário é considerada em regressão quando:
+    • a mediana piorou mais do que a margem configurada para a métrica, e
+    • o teste de Mann-Whitney unilateral indica piora significativa após a
+      correção de Holm-Bonferroni para o número de comparações realizadas.
+
+Com poucas execuções e muitas comparações, o teste pode não ter como atingir o
+limiar de Holm nem com a piora mais extrema possível (ex.: 5 execuções novas
+contra 30 da baseline em 80 comparações). Uma métrica cuja mediana piorou mais
+do que a margem, mas cujo menor p-valor atingível está acima do limiar, é
+marcada como inconclusiva em vez de aprovada.
+
+O comando `comparar` termina com código de saída 1 se houver regressão, o que
+permite usá-lo para bloquear uma versão ruim do plano de dados. Comparações
+inconclusivas e cenários da baseline ausentes na nova campanha, ou com menos
+de EXECUCOES_MINIMAS execuções válidas, também reprovam a verificação (um
+cenário que deixou de funcionar não pode passar despercebido), a menos que
+`--tolerar-ausentes` seja informado.
+
+Exemplo de uso:
+    python regressao_vazao.py salvar --baseline baseline_vazao.json
+    python regressao_vazao.py comparar --campanha nova_campanha --baseline baseline_vazao.json
+"""
+
+import argparse
+import functools
+import glob
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import instrumentacao
+
+
+# Configurações padrão
+ARQUIVO_BASELINE = "baseline_vazao.json"
+DIRETORIOS_BASE = ['p4emu', 'xdp']
+ALFA = 0.01                    # nível de significância (após correção de Holm)
+EXECUCOES_MINIMAS = 5          # execuções mínimas por cenário para comparar
+
+# Métricas por execução: (nome, seção, campo, escala, maior_e_pior)
+METRICAS = [
+    ('vazao_mbps', 'sum_received', 'bits_per_second', 1 / 1_000_000, False),
+    ('lost_percent', 'sum_received', 'lost_percent', 1, True),
+    ('retransmits', 'sum_sent', 'retransmits', 1, True),
+    ('cpu_host_percent', 'cpu_utilization_percent', 'host_total', 1, True),
+    ('cpu_remoto_percent', 'cpu_utilization_percent', 'remote_total', 1, True),
+]
+
+# Piora relativa máxima tolerada na mediana de cada métrica
+MARGENS = {
+    'vazao_mbps': 0.05,
+    'lost_percent': 0.25,
+    'retransmits': 0.25,
+    'cpu_host_percent': 0.10,
+    'cpu_remoto_percent': 0.10,
+}
+
+
+def extrair_execucoes(diretorio_testes):
+    """
+    Extrai os valores de cada métrica, execução a execução, de um diretório de testes.
+
+    Args:
+        diretorio_testes: Caminho do diretório contendo os arquivos JSON
+
+    Returns:
+        dict com o protocolo e as listas de valores por métrica, ou None se
+        não houver testes válidos
+    """
+    arquivos = sorted(glob.glob(os.path.join(diretorio_testes, "iperf3_*.json")))
+
+    protocolo = None
+    metricas = {nome: [] for nome, *_ in METRICAS}
+    testes_validos = 0
+
+    for arquivo in arquivos:
+        try:
+            dados = instrumentacao.ler_json(arquivo)
+        except (OSError, ValueError):
+            continue
+
+        if 'intervals' not in dados or 'end' not in dados:
+            continue
+
+        if protocolo is None and 'start' in dados and 'test_start' in dados['start']:
+            protocolo = dados['start']['test_start'].get('protocol', 'Unknown')
+
+        for nome, secao, campo, escala, _ in METRICAS:
+            valor = dados['end'].get(secao, {}).get(campo)
+            if valor is not None:
+                metricas[nome].append(valor * escala)
+
+        testes_validos += 1
+
+    if testes_validos == 0:
+        return None
+
+    return {
+        'protocolo': protocolo,
+        'testes_validos': testes_validos,
+        'metricas': {nome: valores for nome, valores in metricas.items() if valores},
+    }
+
+
+def coletar_campanha(diretorio_campanha="."):
+    """
+    Coleta as distribuições por execução de todos os cenários de uma campanha.
+
+    Args:
+        diretorio_campanha: Diretório que contém os subdiretórios p4emu/ e xdp/
+
+    Returns:
+        dict {nome_do_cenario: {'sistema', 'protocolo', 'testes_validos', 'metricas'}}
+    """
+    cenarios = {}
+    for dir_base in DIRETORIOS_BASE:
+        caminho_base = Path(diretorio_campanha) / dir_base
+        if not caminho_base.is_dir():
+            continue
+        for subdir in sorted(d for d in caminho_base.iterdir() if d.is_dir()):
+            resultado = extrair_execucoes(str(subdir))
+            if resultado is None:
+                continue
+            resultado['sistema'] = dir_base
+            cenarios[subdir.name] = resultado
+    return cenarios
+
+
+def salvar_baseline(diretorio_campanha=".", arquivo_baseline=ARQUIVO_BASELINE):
+    """
+    Salva as distribuições por execução de uma campanha como baseline.
+
+    Args:
+        diretorio_campanha: Diretório que contém os subdiretórios p4emu/ e xdp/
+        arquivo_baseline: Arquivo JSON onde a baseline é salva
+    """
+    cenarios = coletar_campanha(diretorio_campanha)
+    if not cenarios:
+        print(f"❌ ERRO: Nenhum cenário com testes válidos em '{diretorio_campanha}'")
+        return False
+
+    baseline = {
+        'criada_em': datetime.now().isoformat(timespec='seconds'),
+        'campanha': os.path.abspath(diretorio_campanha),
+        'cenarios': cenarios,
+    }
+    with open(arquivo_baseline, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+
+    total = sum(c['testes_validos'] for c in cenarios.values())
+    print(f"💾 Baseline salva em '{arquivo_baseline}': {len(cenarios)} cenários, {total} execuções")
+    return True
+
+
+def teste_mann_whitney(base, novo, maior_e_pior):
+    """
+    Teste de Mann-Whitney U unilateral (aproximação normal com correção de
+    empates e de continuidade) para a hipótese de que `novo` é pior que `base`.
+
+    Args:
+        base: Valores da baseline
+        novo: Valores da nova campanha
+        maior_e_pior: True se valores maiores indicam piora (perda, CPU, ...)
+
+    Returns:
+        p-valor unilateral
+    """
+    n1, n2 = len(base), len(novo)
+    valores = np.concatenate([np.asarray(base, dtype=float), np.asarray(novo, dtype=float)])
+
+    # Postos médios, tratando empates
+    ordem = np.argsort(valores, kind='mergesort')
+    ordenados = valores[ordem]
+    postos = np.empty(len(valores))
+    inicio = 0
+    correcao_empates = 0.0
+    while inicio < len(ordenados):
+        fim = inicio
+        while fim + 1 < len(ordenados) and ordenados[fim + 1] == ordenados[inicio]:
+            fim += 1
+        postos[ordem[inicio:fim + 1]] = (inicio + fim) / 2 + 1
+        empatados = fim - inicio + 1
+        correcao_empates += empatados ** 3 - empatados
+        inicio = fim + 1
+
+    u_novo = postos[n1:].sum() - n2 * (n2 + 1) / 2
+    media = n1 * n2 / 2
+    n = n1 + n2
+    variancia = n1 * n2 / 12 * ((n + 1) - correcao_empates / (n * (n - 1)))
+    if variancia <= 0:
+        return 1.0
+
+    if maior_e_pior:
+        z = (u_novo - media - 0.5) / math.sqrt(variancia)
+    else:
+        z = (media - u_novo - 0.5) / math.sqrt(variancia)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@functools.lru_cache(maxsize=None)
+def p_valor_minimo(n_base, n_novo):
+    """
+    Menor p-valor que o teste de Mann-Whitney unilateral pode atingir com
+    `n_base` e `n_novo` execuções, obtido quando todas as execuções novas são
+    piores que todas as da baseline (sem empates).
+    """
+    return teste_mann_whitney(np.arange(n_base), np.arange(n_base, n_base + n_novo), True)
+
+
+def comparar_campanhas(baseline, campanha, margens=None, alfa=ALFA):
+    """
+    Compara cada métrica de cada cenário da campanha com a baseline.
+
+    Args:
+        baseline: dict de cenários no formato de coletar_campanha()
+        campanha: dict de cenários no formato de coletar_campanha()
+        margens: dict com a piora relativa máxima tolerada por métrica
+        alfa: Nível de significância global (correção de Holm-Bonferroni)
+
+    Returns:
+        Tupla (comparacoes, ausencias):
+            comparacoes: lista de dicts, com as regressões primeiro e as
+                         inconclusivas em seguida, ordenadas pela gravidade
+                         (piora relativa / margem)
+            ausencias: lista de dicts com os cenários ou métricas da baseline
+                       que não puderam ser comparados por falta de execuções
+                       na nova campanha
+
+    Raises:
+        ValueError: se alguma margem não for positiva
+    """
+    margens = dict(MARGENS, **(margens or {}))
+    for nome, margem in margens.items():
+        if not margem > 0:
+            raise ValueError(f"a margem de '{nome}' deve ser positiva, recebido {margem}")
+    comparacoes = []
+    ausencias = []
+
+    for cenario, dados_base in sorted(baseline.items()):
+        dados_novos = campanha.get(cenario)
+        if dados_novos is None:
+            ausencias.append({
+                'cenario': cenario,
+                'sistema': dados_base.get('sistema'),
+                'metrica': None,
+                'motivo': "ausente na nova campanha",
+            })
+            continue
+
+        for nome, _, _, _, maior_e_pior in METRICAS:
+            base = dados_base['metricas'].get(nome)
+            novo = dados_novos['metricas'].get(nome) or []
+            if not base or len(base) < EXECUCOES_MINIMAS:
+                if base:
+                    print(f"⚠️  {cenario} / {nome}: baseline com menos de {EXECUCOES_MINIMAS} "
+                          f"execuções, pulando...")
+                continue
+            if len(novo) < EXECUCOES_MINIMAS:
+                ausencias.append({
+                    'cenario': cenario,
+                    'sistema': dados_base.get('sistema'),
+                    'metrica': nome,
+                    'motivo': f"{len(novo)} execução(ões) na nova campanha "
+                              f"(mínimo {EXECUCOES_MINIMAS}, baseline {len(base)})",
+                })
+                continue
+
+            mediana_base = float(np.median(base))
+            mediana_nova = float(np.median(novo))
+            diferenca = mediana_nova - mediana_base
+            if not maior_e_pior:
+                diferenca = -diferenca
+            if mediana_base != 0:
+                piora = diferenca / abs(mediana_base)
+            else:
+                piora = math.inf if diferenca > 0 else 0.0
+
+            comparacoes.append({
+                'cenario': cenario,
+                'sistema': dados_base.get('sistema'),
+                'metrica': nome,
+                'mediana_base': mediana_base,
+                'mediana_nova': mediana_nova,
+                'piora_relativa': piora,
+                'margem': margens[nome],
+                'p_valor': teste_mann_whitney(base, novo, maior_e_pior),
+                'p_minimo': p_valor_minimo(len(base), len(novo)),
+                'execucoes_base': len(base),
+                'execucoes_novas': len(novo),
+            })
+
+    # Correção de Holm-Bonferroni sobre todas as comparações
+    total = len(comparacoes)
+    rejeitando = True
+    for posicao, comparacao in enumerate(sorted(comparacoes, key=lambda c: c['p_valor'])):
+        limiar = alfa / (total - posicao)
+        rejeitando = rejeitando and comparacao['p_valor'] <= limiar
+        comparacao['significativo'] = rejeitando
+
+    for comparacao in comparacoes:
+        acima_da_margem = comparacao['piora_relativa'] > comparacao['margem']
+        comparacao['regressao'] = comparacao['significativo'] and acima_da_margem
+        # A piora passou da margem, mas nem o caso mais extremo seria significativo
+        comparacao['inconclusivo'] = (not comparacao['significativo'] and acima_da_margem
+                                      and comparacao['p_minimo'] > alfa / total)
+
+    comparacoes.sort(key=lambda c: (not c['regressao'], not c['inconclusivo'],
+                                    -c['piora_relativa'] / c['margem']))
+    return comparacoes, ausencias
+
+
+def baseline_valida(baseline):
+    """
+    Verifica se o JSON carregado tem o formato gerado por salvar_baseline():
+    um dict com 'cenarios', cada cenário com um dict 'metricas' de listas numéricas.
+    """
+    if not isinstance(baseline, dict) or not isinstance(baseline.get('cenarios'), dict):
+        return False
+    for dados in baseline['cenarios'].values():
+        if not isinstance(dados, dict) or not isinstance(dados.get('metricas'), dict):
+            return False
+        for valores in dados['metricas'].values():
+            if not isinstance(valores, list) or not all(
+                    isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+                return False
+    return True
+
+
+def imprimir_comparacoes(comparacoes):
+    """Imprime o diff ordenado das comparações, com as regressões primeiro."""
+    print(f"\n{'':<3}{'Cenário':<22} {'Métrica':<20} {'Baseline':>12} {'Nova':>12} "
+          f"{'Piora':>9} {'Margem':>8} {'p-valor':>10}")
+    print("─" * 102)
+    for c in comparacoes:
+        if c['regressao']:
+            marcador = "❌"
+        elif c['inconclusivo']:
+            marcador = "❓"
+        else:
+            marcador = "✅" if c['piora_relativa'] <= 0 else "  "
+        piora = "inf" if math.isinf(c['piora_relativa']) else f"{c['piora_relativa'] * 100:+.1f}%"
+        print(f"{marcador:<3}{c['cenario']:<22} {c['metrica']:<20} {c['mediana_base']:>12.3f} "
+              f"{c['mediana_nova']:>12.3f} {piora:>9} {c['margem'] * 100:>7.1f}% "
+              f"{c['p_valor']:>10.2e}")
+
+
+def imprimir_ausencias(ausencias, tolerar_ausentes):
+    """Imprime os cenários e métricas da baseline que não puderam ser comparados."""
+    marcador = "⚠️ " if tolerar_ausentes else "❌"
+    print()
+    for a in ausencias:
+        alvo = a['cenario'] if a['metrica'] is None else f"{a['cenario']} / {a['metrica']}"
+        print(f"{marcador} {alvo}: {a['motivo']}")
+
+
+def verificar_regressao(diretorio_campanha=".", arquivo_baseline=ARQUIVO_BASELINE,
+                        margens=None, alfa=ALFA, tolerar_ausentes=False):
+    """
+    Compara uma campanha com a baseline e imprime o diff ordenado.
+
+    Args:
+        tolerar_ausentes: Se True, comparações inconclusivas e cenários ou
+                          métricas da baseline sem execuções suficientes na
+                          nova campanha geram apenas um aviso; caso
+                          contrário, reprovam a verificação
+
+    Returns:
+        Código de saída: 0 sem regressão, 1 com regressão, comparações
+        inconclusivas ou cenários ausentes, 2 em caso de erro
+    """
+    try:
+        with open(arquivo_baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"❌ ERRO: Baseline '{arquivo_baseline}' não encontrada. Use o comando 'salvar' primeiro.")
+        return 2
+    except json.JSONDecodeError:
+        print(f"❌ ERRO: Baseline '{arquivo_baseline}' contém um JSON inválido.")
+        return 2
+    if not baseline_valida(baseline):
+        print(f"❌ ERRO: '{arquivo_baseline}' não tem o formato de uma baseline gerada pelo comando 'salvar'.")
+        return 2
+
+    campanha = coletar_campanha(diretorio_campanha)
+    if not campanha:
+        print(f"❌ ERRO: Nenhum cenário com testes válidos em '{diretorio_campanha}'")
+        return 2
+
+    print(f"📊 Comparando '{diretorio_campanha}' com a baseline '{arquivo_baseline}' "
+          f"(criada em {baseline.get('criada_em', '?')})")
+    try:
+        comparacoes, ausencias = comparar_campanhas(baseline['cenarios'], campanha, margens, alfa)
+    except ValueError as e:
+        print(f"❌ ERRO: {e}")
+        return 2
+
+    if comparacoes:
+        imprimir_comparacoes(comparacoes)
+    if ausencias:
+        imprimir_ausencias(ausencias, tolerar_ausentes)
+    if not comparacoes:
+        print("❌ ERRO: Nenhuma métrica com execuções suficientes em comum entre a baseline e a nova campanha.")
+        return 2
+
+    regressoes = [c for c in comparacoes if c['regressao']]
+    print()
+    falhou = False
+    if regressoes:
+        sistemas = sorted({c['sistema'] for c in regressoes})
+        print(f"❌ {len(regressoes)} regressão(ões) detectada(s) em: {', '.join(s.upper() for s in sistemas)}")
+        falhou = True
+    inconclusivas = [c for c in comparacoes if c['inconclusivo']]
+    if inconclusivas:
+        marcador = "⚠️ " if tolerar_ausentes else "❌"
+        limiar = alfa / len(comparacoes)
+        print(f"{marcador} {len(inconclusivas)} comparação(ões) inconclusiva(s): a piora passou da "
+              f"margem, mas com tão poucas execuções o p-valor não pode ficar abaixo de {limiar:.2e}")
+        for c in inconclusivas:
+            print(f"   {c['cenario']} / {c['metrica']}: {c['execucoes_base']} x {c['execucoes_novas']} "
+                  f"execuções, menor p-valor possível {c['p_minimo']:.2e}")
+        falhou = falhou or not tolerar_ausentes
+    if ausencias and not tolerar_ausentes:
+        sistemas = sorted({a['sistema'] for a in ausencias})
+        print(f"❌ {len(ausencias)} cenário(s)/métrica(s) da baseline sem execuções suficientes em: "
+              f"{', '.join(s.upper() for s in sistemas)} (use --tolerar-ausentes para apenas avisar)")
+        falhou = True
+    if falhou:
+        return 1
+
+    print(f"✅ Nenhuma regressão acima das margens ({len(comparacoes)} comparações, α = {alfa})")
+    return 0
+
+
+def _ler_margem(texto):
+    """Converte 'metrica=valor' em (metrica, valor) para o argparse."""
+    nome, _, valor = texto.partition('=')
+    if nome not in MARGENS or not valor:
+        raise argparse.ArgumentTypeError(
+            f"use METRICA=VALOR, com METRICA em: {', '.join(MARGENS)}")
+    try:
+        margem = float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"margem inválida para {nome}: '{valor}'")
+    if not margem > 0:
+        raise argparse.ArgumentTypeError(f"a margem de {nome} deve ser positiva, recebido {valor}")
+    return nome, margem
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificação de regressão contra uma baseline")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_salvar = subparsers.add_parser('salvar', help="salva uma campanha como baseline")
+    parser_comparar = subparsers.add_parser('comparar', help="compara uma campanha com a baseline")
+    for sub in (parser_salvar, parser_comparar):
+        sub.add_argument('--campanha', default=".",
+                         help="diretório que contém p4emu/ e xdp/ (padrão: diretório atual)")
+        sub.add_argument('--baseline', default=ARQUIVO_BASELINE, help="arquivo da baseline")
+    parser_comparar.add_argument('--alfa', type=float, default=ALFA,
+                                 help="nível de significância global (padrão: %(default)s)")
+    parser_comparar.add_argument('--margem', type=_ler_margem, action='append', default=[],
+                                 metavar='METRICA=VALOR',
+                                 help="piora relativa máxima tolerada, ex.: vazao_mbps=0.05")
+    parser_comparar.add_argument('--tolerar-ausentes', action='store_true',
+                                 help="apenas avisa (em vez de reprovar) quando cenários ou métricas "
+                                      "da baseline não têm execuções suficientes na nova campanha "
+                                      "ou quando uma comparação é inconclusiva")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'salvar':
+        return 0 if salvar_baseline(args.campanha, args.baseline) else 2
+    return verificar_regressao(args.campanha, args.baseline, dict(args.margem), args.alfa,
+                               args.tolerar_ausentes)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
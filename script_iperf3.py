@@ -1,65 +1,373 @@
+import json
+import os
+import re
+import socket
 import subprocess
 import time
 from datetime import datetime
 
 # Configurações básicas
 SERVIDOR = "10.10.10.10"       # IP do servidor iperf3
+PORTA = 5201                   # porta do servidor iperf3
 DURACAO = 300                  # duração de cada teste (segundos)
 CONEXOES = 1                   # número de conexões paralelas
 BANDA = "1G"                   # largura de banda alvo
 TOTAL_TESTES = 30              # número total de testes
 INTERVALO = 10                 # tempo de espera entre os testes (segundos)
 
+# Retentativas e espera pelo servidor
+MAX_TENTATIVAS = 4             # tentativas por teste antes de desistir
+ESPERA_INICIAL = 15            # espera antes da 1ª retentativa (segundos), dobra a cada falha
+AGUARDAR_SERVIDOR = True       # após o INTERVALO, verifica se o servidor aceita conexões
+ESPERA_MAXIMA_SERVIDOR = 120   # tempo máximo aguardando o servidor aceitar conexões (segundos)
+FOLGA_TIMEOUT = 60             # tempo além de DURACAO antes de abortar um iperf3 travado (segundos)
+
 # Arquivo de log resumido
 ARQUIVO_LOG = "iperf3_resumo.log"
 
+# Arquivo com o estado da campanha, usado para retomar após uma interrupção
+ARQUIVO_ESTADO = "estado_campanha.json"  # fora do padrão iperf3_*.json dos resultados
+
+# Diretório para onde são movidos resultados gerados com outra configuração
+DIRETORIO_ARQUIVADOS = "iperf3_arquivados"
+
+
+def registra_log(mensagem):
+    """
+    Imprime a mensagem e a acrescenta ao log resumido.
+    """
+    linha = f"{datetime.now()} - {mensagem}\n"
+    print(linha, end="")
+    with open(ARQUIVO_LOG, "a") as log:
+        log.write(linha)
+
+
+def nome_arquivo_teste(indice):
+    """
+    Retorna o nome do arquivo JSON do teste de índice `indice`.
+    """
+    return f"iperf3_{CONEXOES}_{BANDA}_{indice:02d}.json"
+
+
+def configuracao_atual():
+    """
+    Retorna a configuração da campanha, gravada junto ao estado para detectar
+    retomadas com parâmetros diferentes.
+    """
+    return {
+        "servidor": SERVIDOR,
+        "duracao": DURACAO,
+        "conexoes": CONEXOES,
+        "banda": BANDA,
+        "total_testes": TOTAL_TESTES,
+    }
+
+
+def banda_em_bps(banda):
+    """
+    Converte a banda no formato aceito pelo iperf3 (ex.: "500M", "500mb",
+    "1G") em bits/s.
+
+    Assim como o iperf3, lê um número seguido opcionalmente de um sufixo
+    k/m/g/t (maiúsculo ou minúsculo, múltiplos de 1000) e ignora o restante
+    (ex.: o "b" de "500mb" ou o "/100" de uma rajada).
+
+    Returns:
+        Banda em bits/s, ou None se o texto não começar com um número
+    """
+    correspondencia = re.match(r"\s*(\d+(?:\.\d*)?|\.\d+)([kKmMgGtT]?)", banda)
+    if correspondencia is None:
+        return None
+    numero, sufixo = correspondencia.groups()
+    multiplicadores = {"": 1, "k": 1e3, "m": 1e6, "g": 1e9, "t": 1e12}
+    return int(float(numero) * multiplicadores[sufixo.lower()])
+
+
+def divergencias_configuracao(dados):
+    """
+    Compara os parâmetros gravados pelo próprio iperf3 em `start` com a
+    configuração atual.
+
+    Parâmetros ausentes no arquivo, ou uma BANDA que não pode ser
+    interpretada, não são comparados: na dúvida o resultado é mantido.
+
+    Returns:
+        Lista com os nomes dos parâmetros que diferem da configuração atual
+        (vazia se o resultado foi gerado com a configuração atual)
+    """
+    inicio = dados.get("start") or {}
+    parametros = inicio.get("test_start") or {}
+    comparacoes = {
+        "servidor": ((inicio.get("connecting_to") or {}).get("host"), SERVIDOR),
+        "duracao": (parametros.get("duration"), DURACAO),
+        "conexoes": (parametros.get("num_streams"), CONEXOES),
+        "banda": (parametros.get("target_bitrate"), banda_em_bps(BANDA)),
+    }
+    return [nome for nome, (gravado, atual) in comparacoes.items()
+            if gravado is not None and atual is not None and gravado != atual]
+
+
+def arquiva_resultado(nome_arquivo):
+    """
+    Move um resultado gerado com outra configuração para DIRETORIO_ARQUIVADOS,
+    em vez de sobrescrevê-lo com o novo teste.
+    """
+    os.makedirs(DIRETORIO_ARQUIVADOS, exist_ok=True)
+    carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+    destino = os.path.join(DIRETORIO_ARQUIVADOS, f"{carimbo}_{nome_arquivo}")
+    os.replace(nome_arquivo, destino)
+    return destino
+
+
+def carrega_estado():
+    """
+    Lê o estado da campanha salvo em disco, ou cria um estado vazio.
+    """
+    try:
+        with open(ARQUIVO_ESTADO) as f:
+            estado = json.load(f)
+    except FileNotFoundError:
+        return {"configuracao": configuracao_atual(), "testes": {}}
+    except json.JSONDecodeError:
+        print(f"⚠️  Estado '{ARQUIVO_ESTADO}' corrompido, os resultados em disco serão conferidos novamente.")
+        return {"configuracao": configuracao_atual(), "testes": {}}
+
+    if estado.get("configuracao") != configuracao_atual():
+        print(f"⚠️  A configuração mudou desde a última execução: os resultados em disco serão "
+              f"conferidos; os que ainda correspondem à configuração atual são mantidos e os "
+              f"gerados com outro servidor, duração, conexões ou banda serão movidos para "
+              f"'{DIRETORIO_ARQUIVADOS}/' e refeitos.")
+        estado = {"configuracao": configuracao_atual(), "testes": {}}
+    return estado
+
+
+def salva_estado(estado):
+    """
+    Salva o estado da campanha de forma atômica (arquivo temporário + rename),
+    para que uma interrupção no meio da escrita não corrompa o checkpoint.
+    """
+    temporario = ARQUIVO_ESTADO + ".tmp"
+    with open(temporario, "w") as f:
+        json.dump(estado, f, indent=2)
+    os.replace(temporario, ARQUIVO_ESTADO)
+
+
+def le_resultado(nome_arquivo):
+    """
+    Lê o arquivo JSON de um teste iperf3 completo.
+
+    Returns:
+        Tupla (dados, vazão recebida em Mbps), ou (None, None) se o arquivo
+        estiver ausente, truncado ou indicar erro do iperf3
+    """
+    try:
+        with open(nome_arquivo) as f:
+            dados = json.load(f)
+        if "error" in dados or not dados.get("intervals"):
+            return None, None
+        return dados, dados["end"]["sum_received"]["bits_per_second"] / 1_000_000  # Mbps
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None, None
+
+
+def valida_resultado(nome_arquivo):
+    """
+    Verifica se o arquivo JSON contém um teste iperf3 completo.
+
+    Returns:
+        Vazão recebida em Mbps, ou None se o arquivo estiver ausente,
+        truncado ou indicar erro do iperf3
+    """
+    return le_resultado(nome_arquivo)[1]
+
+
+def aguarda_servidor(espera_maxima=ESPERA_MAXIMA_SERVIDOR):
+    """
+    Aguarda até o servidor iperf3 aceitar conexões TCP na porta de controle.
+
+    A verificação indica apenas que o servidor está acessível: o iperf3
+    aceita a conexão mesmo quando está ocupado com outro teste, e esse caso
+    só é detectado pelo erro "server is busy", tratado pelas retentativas.
+
+    Returns:
+        True se o servidor ficou pronto dentro de `espera_maxima` segundos
+    """
+    limite = time.time() + espera_maxima
+    while True:
+        try:
+            with socket.create_connection((SERVIDOR, PORTA), timeout=2):
+                return True
+        except OSError:
+            if time.time() >= limite:
+                return False
+            time.sleep(1)
+
+
+def espera_proximo_teste():
+    """
+    Aguarda entre dois testes: sempre espera o INTERVALO mínimo e, quando
+    AGUARDAR_SERVIDOR está ativo, verifica em seguida se o servidor está acessível.
+    """
+    print(f"⏳ Aguardando {INTERVALO}s antes do próximo teste...")
+    time.sleep(INTERVALO)
+    if AGUARDAR_SERVIDOR and not aguarda_servidor():
+        print(f"⚠️  Servidor não respondeu em {ESPERA_MAXIMA_SERVIDOR}s, seguindo mesmo assim.")
+
+
 def executa_teste(indice):
     """
     Executa um teste do iperf3 e salva o resultado em JSON.
+
+    A saída é gravada primeiro em um arquivo temporário e só substitui o
+    arquivo final quando o resultado é válido, de forma que um teste
+    interrompido nunca sobrescreve um resultado anterior.
+
+    Returns:
+        Vazão recebida em Mbps
+
+    Raises:
+        RuntimeError: se o iperf3 falhar, exceder DURACAO + FOLGA_TIMEOUT
+                      ou gerar um resultado inválido
     """
-    nome_arquivo = f"iperf3_1_1G_{indice:02d}.json"
+    nome_arquivo = nome_arquivo_teste(indice)
+    temporario = nome_arquivo + ".parcial"
     comando = [
         "iperf3",
         "-c", SERVIDOR,
+        "-p", str(PORTA),
         "-t", str(DURACAO),
+        "-P", str(CONEXOES),
         "-b", BANDA,
         "-J"
     ]
 
-    print(f"\n🚀 Iniciando teste {indice}/{TOTAL_TESTES} ...")
-    inicio = time.time()
-
+    limite = DURACAO + FOLGA_TIMEOUT
     try:
-        with open(nome_arquivo, "w") as saida_json:
-            subprocess.run(comando, stdout=saida_json, stderr=subprocess.PIPE, check=True)
-        fim = time.time()
-        duracao_exec = fim - inicio
+        with open(temporario, "w") as saida_json:
+            subprocess.run(comando, stdout=saida_json, stderr=subprocess.PIPE, check=True,
+                           timeout=limite)
+    except subprocess.TimeoutExpired:
+        # O iperf3 pode travar se o servidor desaparecer no meio do teste
+        os.remove(temporario)
+        raise RuntimeError(f"iperf3 não terminou em {limite}s e foi interrompido")
+    except subprocess.CalledProcessError as e:
+        mensagem = e.stderr.decode(errors='ignore').strip()
+        # Com -J o iperf3 também descreve o erro (ex.: "server is busy") no JSON
+        try:
+            with open(temporario) as f:
+                mensagem = json.load(f).get("error", mensagem)
+        except (OSError, ValueError):
+            pass
+        os.remove(temporario)
+        raise RuntimeError(mensagem or f"iperf3 terminou com código {e.returncode}")
 
-        # Lê o resultado JSON para extrair o throughput total
-        import json
-        with open(nome_arquivo) as f:
-            dados = json.load(f)
-            throughput = dados["end"]["sum_received"]["bits_per_second"] / 1_000_000  # Mbps
+    throughput = valida_resultado(temporario)
+    if throughput is None:
+        os.remove(temporario)
+        raise RuntimeError("resultado JSON incompleto ou inválido")
+    os.replace(temporario, nome_arquivo)
+    return throughput
 
-        resumo = f"{datetime.now()} - Teste {indice:02d}: {throughput:.2f} Mbps (durou {duracao_exec:.1f}s)\n"
-        print(f"✅ {resumo}")
 
-        with open(ARQUIVO_LOG, "a") as log:
-            log.write(resumo)
+def executa_com_retentativas(indice, estado):
+    """
+    Executa o teste `indice`, repetindo com espera exponencial em caso de
+    falha, e registra o resultado no estado da campanha.
+
+    Returns:
+        True se o teste foi concluído com sucesso
+    """
+    chave = f"{indice:02d}"
+    registro = estado["testes"].setdefault(chave, {"status": "pendente", "tentativas": 0})
+    espera = ESPERA_INICIAL
+
+    for tentativa in range(1, MAX_TENTATIVAS + 1):
+        print(f"\n🚀 Iniciando teste {indice}/{TOTAL_TESTES} (tentativa {tentativa}/{MAX_TENTATIVAS}) ...")
+        registro["tentativas"] += 1
+        inicio = time.time()
+
+        try:
+            throughput = executa_teste(indice)
+        except RuntimeError as e:
+            registro.update({"status": "falhou", "erro": str(e)})
+            salva_estado(estado)
+            registra_log(f"❌ Teste {chave} falhou (tentativa {tentativa}/{MAX_TENTATIVAS}): {e}")
+            if tentativa < MAX_TENTATIVAS:
+                print(f"⏳ Nova tentativa em {espera}s...")
+                time.sleep(espera)
+                espera *= 2
+                if AGUARDAR_SERVIDOR:
+                    aguarda_servidor()
+            continue
+
+        duracao_exec = time.time() - inicio
+        registro.update({
+            "status": "concluido",
+            "arquivo": nome_arquivo_teste(indice),
+            "vazao_mbps": throughput,
+            "concluido_em": datetime.now().isoformat(timespec='seconds'),
+        })
+        registro.pop("erro", None)
+        salva_estado(estado)
+        registra_log(f"✅ Teste {chave}: {throughput:.2f} Mbps (durou {duracao_exec:.1f}s)")
+        return True
+
+    return False
+
+
+def teste_concluido(indice, estado):
+    """
+    Verifica se o teste já foi concluído em uma execução anterior e se o
+    arquivo em disco continua válido e foi gerado com a configuração atual.
+
+    Um resultado completo gerado com outra configuração (ex.: outra DURACAO)
+    é movido para DIRETORIO_ARQUIVADOS, para que o teste seja refeito sem
+    sobrescrevê-lo.
+    """
+    nome_arquivo = nome_arquivo_teste(indice)
+    dados, vazao = le_resultado(nome_arquivo)
+    if dados is None:
+        return False
+    divergencias = divergencias_configuracao(dados)
+    if divergencias:
+        destino = arquiva_resultado(nome_arquivo)
+        print(f"📦 {nome_arquivo} foi gerado com outra configuração "
+              f"({', '.join(divergencias)}), movido para {destino}")
+        return False
+    # O arquivo pode estar completo mesmo sem registro no estado (ex.: interrupção
+    # logo após a gravação), então o estado é atualizado a partir do disco
+    registro = estado["testes"].setdefault(f"{indice:02d}", {"tentativas": 0})
+    registro.update({"status": "concluido", "arquivo": nome_arquivo, "vazao_mbps": vazao})
+    return True
 
-    except subprocess.CalledProcessError as e:
-        erro = f"{datetime.now()} - Teste {indice:02d} falhou: {e.stderr.decode(errors='ignore')}\n"
-        print(f"❌ {erro}")
-        with open(ARQUIVO_LOG, "a") as log:
-            log.write(erro)
 
 def main():
+    if banda_em_bps(BANDA) is None:
+        print(f"⚠️  Não foi possível interpretar BANDA = '{BANDA}': a banda dos resultados "
+              f"já gravados não será conferida ao retomar a campanha.")
+    estado = carrega_estado()
+    concluidos = [i for i in range(1, TOTAL_TESTES + 1) if teste_concluido(i, estado)]
+    salva_estado(estado)
+
     print(f"=== Iniciando {TOTAL_TESTES} testes de iperf3 ===")
+    if concluidos:
+        print(f"♻️  Retomando campanha: {len(concluidos)} teste(s) já concluído(s) serão pulados")
+
+    falhas = []
+    executou_teste = False
     for i in range(1, TOTAL_TESTES + 1):
-        executa_teste(i)
-        if i < TOTAL_TESTES:
-            print(f"⏳ Aguardando {INTERVALO}s antes do próximo teste...")
-            time.sleep(INTERVALO)
+        if i in concluidos:
+            continue
+        if executou_teste:
+            espera_proximo_teste()
+        executou_teste = True
+        if not executa_com_retentativas(i, estado):
+            falhas.append(i)
+
+    if falhas:
+        lista = ", ".join(f"{i:02d}" for i in falhas)
+        print(f"⚠️  {len(falhas)} teste(s) falharam após {MAX_TENTATIVAS} tentativas: {lista}")
+        print(f"   Execute o script novamente para repetir apenas os testes pendentes.")
     print("🏁 Todos os testes finalizados!")
 
 if __name__ == "__main__":
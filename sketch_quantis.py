@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sketch de quantis mesclável para distribuições de vazão por intervalo.
+
+Implementa um sketch com erro relativo garantido (no estilo DDSketch): cada
+valor positivo é contado em um balde logarítmico de índice ceil(log_γ(v)),
+com γ = (1 + α) / (1 - α). Qualquer quantil estimado tem erro relativo de no
+máximo α (0,1% por padrão), a memória depende apenas da faixa de valores (e não
+do número de intervalos) e dois sketches com o mesmo α são mesclados somando
+as contagens de cada balde, sem perda de precisão.
+
+Assim, os percentis de vazão de milhões de intervalos podem ser calculados
+mesclando os sketches de cada execução, cenário ou campanha, sem reprocessar
+os arquivos JSON originais.
+
+Exemplo de uso:
+    sketch = sketch_de_intervalos(dados['intervals'])
+    sketch.mesclar(SketchQuantis.de_dict(outro_sketch_salvo))
+    p99 = sketch.quantil(0.99)
+"""
+
+import math
+
+import numpy as np
+
+
+ALFA_PADRAO = 0.001            # erro relativo máximo dos quantis (0,1%)
+
+
+class SketchQuantis:
+    """
+    Sketch de quantis com erro relativo α, mesclável e serializável em JSON.
+    """
+
+    def __init__(self, alfa=ALFA_PADRAO):
+        if not 0 < alfa < 1:
+            raise ValueError(f"alfa deve estar entre 0 e 1, recebido {alfa}")
+        self.alfa = alfa
+        self.gama = (1 + alfa) / (1 - alfa)
+        self._log_gama = math.log(self.gama)
+        self.baldes = {}
+        self.zeros = 0
+        self.contagem = 0
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def adicionar(self, valor):
+        """Adiciona um valor não negativo ao sketch."""
+        self.adicionar_varios([valor])
+
+    def adicionar_varios(self, valores):
+        """
+        Adiciona uma sequência de valores não negativos ao sketch.
+
+        Args:
+            valores: Sequência (lista ou array NumPy) de valores
+        """
+        valores = np.asarray(valores, dtype=float)
+        if valores.size == 0:
+            return
+        if np.any(valores < 0) or not np.all(np.isfinite(valores)):
+            raise ValueError("o sketch aceita apenas valores finitos e não negativos")
+
+        positivos = valores[valores > 0]
+        self.zeros += int(valores.size - positivos.size)
+        if positivos.size:
+            indices = np.ceil(np.log(positivos) / self._log_gama).astype(np.int64)
+            for indice, quantidade in zip(*np.unique(indices, return_counts=True)):
+                indice = int(indice)
+                self.baldes[indice] = self.baldes.get(indice, 0) + int(quantidade)
+
+        self.contagem += int(valores.size)
+        self.soma += float(valores.sum())
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def mesclar(self, outro):
+        """
+        Mescla outro sketch a este (in-place).
+
+        Args:
+            outro: SketchQuantis com o mesmo α
+
+        Returns:
+            O próprio sketch, para permitir encadeamento
+        """
+        if outro.alfa != self.alfa:
+            raise ValueError(f"não é possível mesclar sketches com α diferentes ({self.alfa} e {outro.alfa})")
+        for indice, quantidade in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + quantidade
+        self.zeros += outro.zeros
+        self.contagem += outro.contagem
+        self.soma += outro.soma
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        return self
+
+    def quantil(self, q):
+        """
+        Estima o quantil q (0 ≤ q ≤ 1), com erro relativo de no máximo α.
+
+        Returns:
+            Valor estimado do quantil, ou None se o sketch estiver vazio
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q deve estar entre 0 e 1, recebido {q}")
+        if self.contagem == 0:
+            return None
+
+        posto = q * (self.contagem - 1)
+        acumulado = self.zeros
+        if acumulado > posto:
+            return 0.0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if acumulado > posto:
+                estimativa = 2 * self.gama ** indice / (self.gama + 1)
+                return min(max(estimativa, self.minimo), self.maximo)
+        return self.maximo
+
+    def media(self):
+        """Retorna a média exata dos valores adicionados, ou None se vazio."""
+        return self.soma / self.contagem if self.contagem else None
+
+    def para_dict(self):
+        """Serializa o sketch em um dicionário compatível com JSON."""
+        return {
+            'alfa': self.alfa,
+            'contagem': self.contagem,
+            'zeros': self.zeros,
+            'soma': self.soma,
+            'minimo': self.minimo if self.contagem else None,
+            'maximo': self.maximo if self.contagem else None,
+            'baldes': {str(indice): quantidade for indice, quantidade in sorted(self.baldes.items())},
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Reconstrói um sketch a partir do dicionário gerado por para_dict()."""
+        sketch = cls(dados['alfa'])
+        sketch.baldes = {int(indice): int(quantidade) for indice, quantidade in dados['baldes'].items()}
+        sketch.zeros = dados['zeros']
+        sketch.contagem = dados['contagem']
+        sketch.soma = dados['soma']
+        if sketch.contagem:
+            sketch.minimo = dados['minimo']
+            sketch.maximo = dados['maximo']
+        return sketch
+
+    def __len__(self):
+        return self.contagem
+
+
+def sketch_de_intervalos(intervalos, alfa=ALFA_PADRAO):
+    """
+    Resume a série de intervalos de uma execução do iperf3 em um sketch.
+
+    Intervalos sem 'sum' ou com vazão não numérica, negativa ou não finita são
+    ignorados, de modo que um valor inválido não descarta a execução inteira.
+
+    Args:
+        intervalos: Lista `intervals` do JSON do iperf3
+        alfa: Erro relativo máximo dos quantis
+
+    Returns:
+        SketchQuantis com a vazão (bits/s) de cada intervalo válido
+    """
+    valores = []
+    for intervalo in intervalos:
+        valor = intervalo.get('sum', {}).get('bits_per_second') if isinstance(intervalo, dict) else None
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool) and 0 <= valor < math.inf:
+            valores.append(valor)
+    sketch = SketchQuantis(alfa)
+    sketch.adicionar_varios(valores)
+    return sketch
+
+
+def mesclar_sketches(sketches):
+    """
+    Mescla uma sequência de sketches (objetos ou dicionários serializados).
+
+    Returns:
+        Novo SketchQuantis com a união de todos os valores, com o α do
+        primeiro sketch (ou ALFA_PADRAO se a sequência estiver vazia)
+    """
+    resultado = None
+    for sketch in sketches:
+        if isinstance(sketch, dict):
+            sketch = SketchQuantis.de_dict(sketch)
+        if resultado is None:
+            resultado = SketchQuantis(sketch.alfa)
+        resultado.mesclar(sketch)
+    return resultado if resultado is not None else SketchQuantis()